@@ -1,4 +1,9 @@
 from fastapi import FastAPI
+from routers.inference_runtime import configure_runtime
+
+# Thread limits must be in place before the routers below load their models
+configure_runtime()
+
 from routers.new_contract_request_api import router as new_contract_router
 from routers.proposal_summary import router as proposal_summary_router
 from routers.checklist_generator_api import router as checklist_validation_router
@@ -15,6 +20,7 @@ from routers.redline_ai_model import router as redline_ai_router
 from routers.renewal_recommender import router as renewal_recommender_router
 from routers.ai_draft_generator import router as ai_draft_router
 from routers.admin import router as admin_router
+from routers.contract_metadata_router import router as contract_metadata_router
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -50,5 +56,6 @@ app.include_router(redline_ai_router,prefix="/api/redline_ai_router",tags=["Redl
 app.include_router(renewal_recommender_router,prefix="/api/renewal/recommend",tags=["Renewal_recommender"])
 app.include_router(ai_draft_router,prefix="/api/ai_draft/generator",tags=["AI_draft_generator"])
 app.include_router(admin_router,prefix="/api/admin",tags=['admin'])
+app.include_router(contract_metadata_router,prefix="/api/contract_metadata",tags=["Contract_Metadata"])
 
 
@@ -0,0 +1,86 @@
+"""
+Accuracy and throughput of the clause-type classifiers behind transformer_type.
+
+Run from the project root:
+    python -m benchmarks.bench_clause_classifier [--limit 500] [--skip-mnli]
+
+Clauses come from the OCR samples (preprocessed and segmented the way the
+clause pipeline does it). There is no hand-labelled set, so the rule engine's
+label is used as weak ground truth on the clauses it can classify. The MNLI
+pipeline only emits ENTAILMENT/NEUTRAL/CONTRADICTION, so it gets a throughput
+figure but no accuracy.
+"""
+import argparse
+import time
+from collections import Counter
+from pathlib import Path
+
+from transformers import pipeline
+
+from routers.clause_centroids import build_centroid_classifier
+from routers.clause_matching import TextProcessor, ClauseSegmenter
+from routers.clause_rules import get_rule_set
+from config import CLAUSE_CENTROID_MIN_SCORE
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_documents(limit):
+    processor, segmenter = TextProcessor(), ClauseSegmenter()
+    documents, total = [], 0
+    for path in sorted((BASE_DIR / "ocr_output").glob("*.txt")):
+        cleaned = processor.preprocess_text(path.read_text(encoding="utf-8"))
+        texts = [c.text for c in segmenter.iter_clauses(cleaned, source_file=path.name) if c.text.strip()]
+        texts = texts[: max(0, limit - total)]
+        if texts:
+            documents.append(texts)
+            total += len(texts)
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=500, help="maximum number of clauses")
+    parser.add_argument("--skip-mnli", action="store_true", help="skip the roberta-large-mnli baseline")
+    args = parser.parse_args()
+
+    documents = load_documents(args.limit)
+    clauses = [text for texts in documents for text in texts]
+    rules = get_rule_set("clause_processor")
+    truth = [rules.classify(text) for text in clauses]
+    labelled = [i for i, label in enumerate(truth) if label != rules.default]
+    print(f"{len(clauses)} clauses in {len(documents)} documents, {len(labelled)} with a rule label")
+
+    centroid = build_centroid_classifier(min_score=CLAUSE_CENTROID_MIN_SCORE)
+    centroid.classify_batch(clauses[:8])  # warm-up
+    start = time.perf_counter()
+    predicted = []
+    for texts in documents:
+        # one embed call + one matmul per document, as in enrich_clauses
+        predicted.extend(label for label, _ in centroid.classify_batch(texts))
+    centroid_time = time.perf_counter() - start
+
+    correct = sum(predicted[i] == truth[i] for i in labelled)
+    accuracy = correct / len(labelled) if labelled else float("nan")
+
+    print(f"{'classifier':<12}{'clauses/s':>12}{'accuracy':>10}")
+    print(f"{'centroid':<12}{len(clauses) / centroid_time:>12.1f}{accuracy:>10.3f}")
+
+    if not args.skip_mnli:
+        mnli = pipeline("text-classification", model="roberta-large-mnli", truncation=True)
+        mnli(clauses[0][:512])  # warm-up
+        start = time.perf_counter()
+        for text in clauses:
+            mnli(text[:512])
+        mnli_time = time.perf_counter() - start
+        print(f"{'mnli':<12}{len(clauses) / mnli_time:>12.1f}{'n/a':>10}")
+
+    confusion = Counter((truth[i], predicted[i]) for i in labelled if predicted[i] != truth[i])
+    if confusion:
+        print("\nMost common disagreements (rule label -> centroid label):")
+        for (expected, got), count in confusion.most_common(10):
+            print(f"  {expected:<18} -> {got:<22}{count:>5}")
+
+
+if __name__ == "__main__":
+    main()
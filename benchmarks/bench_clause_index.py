@@ -0,0 +1,84 @@
+"""
+Exact vs clustered (IVF) search in the clause vector index.
+
+Run from the project root:
+    python -m benchmarks.bench_clause_index [--rows 200000] [--dim 384] [--queries 200] [--nprobe 8]
+
+Builds a throwaway index of synthetic, clustered unit vectors (the shape
+MiniLM clause embeddings have: many near-duplicates of a few hundred clause
+kinds), then times both search paths on the same queries. recall@10 is the
+share of the exact top-10 the clustered search also returns; the exact path
+is the golden result.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from routers.clause_index import ClauseIndex
+
+
+class VectorLookup:
+    """Embeddings stand-in: texts are "v<row>" and map to precomputed vectors."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return self.vectors[[int(t[1:]) for t in texts]]
+
+    def embed_query(self, text):
+        return self.vectors[int(text[1:])]
+
+
+def synthetic_vectors(rows, dim, kinds, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(kinds, dim))
+    vectors = centres[rng.integers(kinds, size=rows)] + 0.6 * rng.normal(size=(rows, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--kinds", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.rows + args.queries, args.dim, args.kinds)
+    embedder = VectorLookup(vectors)
+    with tempfile.TemporaryDirectory() as directory:
+        index = ClauseIndex(embedder, directory, ann_threshold=args.rows + 1, nprobe=args.nprobe)
+        start = time.perf_counter()
+        index.add(({"source_file": "bench", "clause_id": i, "text": f"v{i}"} for i in range(args.rows)), batch_size=4096)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        nlist = index.train()
+        train = time.perf_counter() - start
+        print(f"{args.rows} rows x {args.dim}: indexed in {build:.1f}s, clustered into {nlist} lists in {train:.1f}s")
+
+        queries = [f"v{args.rows + i}" for i in range(args.queries)]
+        timings = {True: [], False: []}
+        recalls = []
+        for query in queries:
+            results = {}
+            for exact in (True, False):
+                start = time.perf_counter()
+                results[exact] = {r["text"] for r in index.search(query, k=10, exact=exact)}
+                timings[exact].append(time.perf_counter() - start)
+            recalls.append(len(results[True] & results[False]) / max(1, len(results[True])))
+
+    print(f"\n{'search':<12}{'p50 ms':>9}{'p95 ms':>9}{'recall@10':>11}")
+    for exact, name in ((True, "exact"), (False, f"ivf/{args.nprobe}")):
+        latencies = sorted(timings[exact])
+        recall = "1.000" if exact else f"{statistics.mean(recalls):.3f}"
+        print(f"{name:<12}{statistics.median(latencies) * 1000:>9.2f}"
+              f"{latencies[int(0.95 * (len(latencies) - 1))] * 1000:>9.2f}{recall:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Equivalence check and throughput benchmark for the shared clause-type rule engine.
+
+Run from the project root:
+    python -m benchmarks.bench_clause_rules [--clauses 10000] [--repeat 3]
+
+The clause set is built from the regulation corpus and the OCR samples, cut
+into paragraph-sized pieces and tiled to --clauses entries. For every rule set
+the per-rule loops that ClauseProcessor.rule_based_classify and
+ClauseValidation._classify_type used to run are the reference; classify() and
+match_all() must agree with them on every clause.
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+from routers.clause_rules import load_rule_sets
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def build_clause_set(count):
+    sources = sorted((BASE_DIR / "clause_compliance").glob("*.txt")) + sorted((BASE_DIR / "ocr_output").glob("*.txt"))
+    pieces = []
+    for path in sources:
+        text = path.read_text(encoding="utf-8")
+        pieces.extend(p.strip() for p in re.split(r"\n\s*\n", text) if len(p.strip()) > 40)
+    if not pieces:
+        raise SystemExit("No clause text found under clause_compliance/ or ocr_output/")
+    return [pieces[i % len(pieces)] for i in range(count)]
+
+
+def reference_first(rules, text):
+    # String patterns through re.search, as _classify_type did
+    for label, pattern in rules:
+        if re.search(pattern, text, flags=re.I):
+            return label
+    return "Uncategorized"
+
+
+def reference_all(rules, text):
+    return [label for label, pattern in rules if re.search(pattern, text, flags=re.I)]
+
+
+def timed(fn, clauses, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for clause in clauses:
+            fn(clause)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    clauses = build_clause_set(args.clauses)
+    print(f"{len(clauses)} clauses, {sum(map(len, clauses)) / 1_000_000:.1f} MB")
+
+    mismatches = 0
+    print(f"{'rule set':<20}{'mode':<8}{'reference s':>13}{'engine s':>10}{'speedup':>9}  check")
+    for name, rule_set in load_rule_sets().items():
+        rules = list(zip(rule_set.labels, (p.pattern for p in rule_set.patterns)))
+        cases = [
+            ("first", lambda t: reference_first(rules, t), rule_set.classify),
+            ("all", lambda t: reference_all(rules, t), rule_set.match_all),
+        ]
+        for mode, reference, engine in cases:
+            ok = all(reference(c) == engine(c) for c in clauses)
+            mismatches += not ok
+            ref_time = timed(reference, clauses, args.repeat)
+            new_time = timed(engine, clauses, args.repeat)
+            print(f"{name:<20}{mode:<8}{ref_time:>13.3f}{new_time:>10.3f}{ref_time / new_time:>8.1f}x  {'ok' if ok else 'MISMATCH'}")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} rule set/mode combination(s) differ from the reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Load test for the inference thread settings (INFERENCE_POOLS workers x
+INFERENCE_INTRA_OP_THREADS).
+
+Run from the project root on the target node:
+    python -m benchmarks.bench_inference_threads [--cores 16] [--requests 256] [--concurrency 32]
+
+Each grid point runs in a fresh process (torch's inter-op pool can only be
+sized once) and fires --requests classification calls at one pool from
+--concurrency concurrent asyncio tasks, the way the FastAPI routes do. Points
+with workers x threads up to 2x the core count are tried, so the table also
+shows what oversubscription costs.
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import re
+import statistics
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+MODEL = "typeform/distilbert-base-uncased-mnli"
+
+
+def sample_clauses(count):
+    pieces = []
+    for path in sorted((BASE_DIR / "ocr_output").glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        pieces.extend(" ".join(p.split())[:1500] for p in re.split(r"\n\s*\n", text) if len(p.split()) >= 25)
+    return [pieces[i % len(pieces)] for i in range(count)]
+
+
+def _run_point(workers, threads, clauses, concurrency, queue):
+    os.environ["INFERENCE_POOLS"] = f"bench:{workers}"
+    os.environ["INFERENCE_INTRA_OP_THREADS"] = str(threads)
+    from routers.inference_runtime import configure_runtime, run_in_pool
+    configure_runtime()
+    from transformers import pipeline
+    classifier = pipeline("text-classification", model=MODEL, truncation=True)
+    classifier(clauses[0])  # warm-up
+
+    async def drive():
+        latencies = []
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(text):
+            async with gate:
+                start = time.perf_counter()
+                await run_in_pool("bench", classifier, text)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(text) for text in clauses))
+        return time.perf_counter() - start, latencies
+
+    elapsed, latencies = asyncio.run(drive())
+    latencies.sort()
+    queue.put({
+        "throughput": len(clauses) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    })
+
+
+def run_point(workers, threads, clauses, concurrency):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_point, args=(workers, threads, clauses, concurrency, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cores", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    clauses = sample_clauses(args.requests)
+    sizes = [n for n in (1, 2, 4, 8, 16, 32) if n <= args.cores]
+    grid = [(w, t) for w in sizes for t in sizes if w * t <= 2 * args.cores]
+
+    results = []
+    print(f"{'workers':>8}{'threads':>9}{'w x t':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for workers, threads in grid:
+        result = run_point(workers, threads, clauses, args.concurrency)
+        results.append((workers, threads, result))
+        print(f"{workers:>8}{threads:>9}{workers * threads:>7}{result['throughput']:>9.1f}"
+              f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}")
+
+    workers, threads, best = max(results, key=lambda r: r[2]["throughput"])
+    print(f"\nBest throughput: INFERENCE_POOLS=<pool>:{workers} INFERENCE_INTRA_OP_THREADS={threads} "
+          f"({best['throughput']:.1f} req/s, p95 {best['p95_ms']:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Regex-derived metadata fields: full scans vs the early-stopping token scan.
+
+Run from the project root:
+    python -m benchmarks.bench_metadata_fields [--repeat 5]
+
+extract_metadata fills contract type, contract number, value, threshold and
+start/end dates from regexes. The reference is the original per-field code:
+findall over the whole document for dates, amounts and contract numbers, and
+one lower-cased copy of the document per contract-type keyword. The token scan
+stops after the matches the fields read. Both run on the cleaned text of every
+OCR sample and the DFARS volume; the fields must agree on every document.
+No models are loaded (NER is not part of either path).
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+from routers.metadata_extraction import (
+    CONTRACT_KEYWORDS, CONTRACT_NUMBER_PATTERN, METADATA_TOKEN_LIMITS, ContractMetadataExtractor,
+)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def reference_fields(text):
+    extractor = ContractMetadataExtractor
+    dates = extractor.DATE_PATTERN.findall(text)
+    money_values = extractor.MONEY_PATTERN.findall(text)
+    found = [k.title() for k in CONTRACT_KEYWORDS if k in text.lower()]
+    numbers = re.findall(CONTRACT_NUMBER_PATTERN, text, flags=re.IGNORECASE)
+    return {
+        "contract_type": found[0] if found else None,
+        "contract_number": numbers[0] if numbers else None,
+        "contract_value": money_values[0] if money_values else None,
+        "threshold": money_values[1] if len(money_values) > 1 else None,
+        "start_date": dates[0] if dates else None,
+        "end_date": dates[1] if len(dates) > 1 else None,
+    }
+
+
+def token_fields(text):
+    # ContractMetadataExtractor without __init__: no models are needed here
+    extractor = ContractMetadataExtractor.__new__(ContractMetadataExtractor)
+    tokens = extractor.scan_tokens(text, limits=METADATA_TOKEN_LIMITS)
+    by_kind = {kind: [t["text"] for t in tokens if t["kind"] == kind] for kind in ("date", "money", "contract_number")}
+    dates, money_values, numbers = by_kind["date"], by_kind["money"], by_kind["contract_number"]
+    return {
+        "contract_type": extractor.extract_keywords(text),
+        "contract_number": numbers[0] if numbers else None,
+        "contract_value": money_values[0] if money_values else None,
+        "threshold": money_values[1] if len(money_values) > 1 else None,
+        "start_date": dates[0] if dates else None,
+        "end_date": dates[1] if len(dates) > 1 else None,
+    }
+
+
+def best_of(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted((BASE_DIR / "ocr_output").glob("*.txt")) + [BASE_DIR / "clause_compliance" / "DFARS.txt"]
+    print(f"{'document':<44}{'KB':>8}{'reference ms':>14}{'tokens ms':>11}{'speedup':>9}  check")
+    mismatches = 0
+    totals = [0.0, 0.0]
+    for path in paths:
+        text = re.sub(r"\s+", " ", path.read_text(encoding="utf-8")).strip()
+        ok = reference_fields(text) == token_fields(text)
+        mismatches += not ok
+        ref_time = best_of(reference_fields, text, args.repeat)
+        new_time = best_of(token_fields, text, args.repeat)
+        totals[0] += ref_time
+        totals[1] += new_time
+        print(f"{path.name[:43]:<44}{len(text) / 1024:>8.0f}{ref_time * 1000:>14.2f}{new_time * 1000:>11.2f}"
+              f"{ref_time / new_time:>8.1f}x  {'ok' if ok else 'MISMATCH'}")
+    print(f"{'total':<52}{totals[0] * 1000:>14.2f}{totals[1] * 1000:>11.2f}{totals[0] / totals[1]:>8.1f}x")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} document(s) differ from the reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Region-targeted vs full-document metadata extraction on the OCR samples.
+
+Run from the project root:
+    python -m benchmarks.bench_metadata_regions [--repeat 3] [--include-regulations]
+
+For every document both modes run on the same extractor instance. The table
+shows the share of the document the regions cover, the best-of-N latency of
+each mode, and whether the extracted metadata fields agree (regex-derived
+fields are computed on the full text in both modes, so any disagreement comes
+from vendor_name). --include-regulations adds the multi-MB DFARS volume,
+the case the region mode exists for.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from routers.metadata_extraction import ContractMetadataExtractor
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--include-regulations", action="store_true")
+    args = parser.parse_args()
+
+    paths = sorted((BASE_DIR / "ocr_output").glob("*.txt"))
+    if args.include_regulations:
+        paths.append(BASE_DIR / "clause_compliance" / "DFARS.txt")
+
+    extractor = ContractMetadataExtractor()
+    extractor.extract_metadata("warm-up text for both NER models.")
+
+    agree_docs, full_total, region_total = 0, 0.0, 0.0
+    print(f"{'document':<45}{'KB':>8}{'coverage':>10}{'full s':>9}{'regions s':>11}  fields")
+    for path in paths:
+        raw = path.read_text(encoding="utf-8")
+        text = extractor.clean_text(raw)
+        coverage = sum(end - start for start, end in extractor.candidate_regions(text)) / max(1, len(text))
+
+        extractor.mode = "full"
+        full_time, full_meta = best_of(lambda: extractor.extract_metadata(raw), args.repeat)
+        extractor.mode = "regions"
+        region_time, region_meta = best_of(lambda: extractor.extract_metadata(raw), args.repeat)
+
+        diff = [k for k in full_meta if full_meta[k] != region_meta.get(k)]
+        agree_docs += not diff
+        full_total += full_time
+        region_total += region_time
+        fields = "same" if not diff else "differ: " + ", ".join(f"{k} {full_meta[k]!r} -> {region_meta.get(k)!r}" for k in diff)
+        print(f"{path.name:<45}{len(raw) / 1000:>8.1f}{coverage:>10.1%}{full_time:>9.3f}{region_time:>11.3f}  {fields}")
+
+    print(f"\n{agree_docs}/{len(paths)} documents with identical metadata; "
+          f"total {full_total:.2f}s full vs {region_total:.2f}s regions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Parity, latency and memory of the ONNX Runtime backend against PyTorch.
+
+Run from the project root:
+    python -m benchmarks.bench_onnx_backend [--clauses 32] [--models roberta-large-mnli,...]
+
+Every (model, backend) pair is loaded in a fresh process so RSS figures are
+not polluted by the other backend. The first ONNX run exports and quantizes
+into ONNX_CACHE_DIR; the reported load time is for the cached model on
+later runs. Parity is checked per task:
+  classification / QA  share of identical labels / answers
+  ner                  share of clauses with identical (entity_group, word) sets
+  embeddings           mean cosine similarity between the two backends' vectors
+  generation           share of identical outputs (reported, not gated; int8
+                       decoding legitimately drifts)
+"""
+import argparse
+import multiprocessing as mp
+import os
+import re
+import statistics
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODELS = [
+    ("text-classification", "roberta-large-mnli", {"truncation": True}),
+    ("summarization", "sshleifer/distilbart-cnn-12-6", {"max_length": 60, "min_length": 20, "do_sample": False}),
+    ("text2text-generation", "google/flan-t5-base", {"max_length": 64}),
+    ("question-answering", "deepset/roberta-base-squad2", {}),
+    ("ner", "dslim/bert-base-NER", {"aggregation_strategy": "simple"}),
+    ("text-classification", "typeform/distilbert-base-uncased-mnli", {"truncation": True}),
+    ("embeddings", "sentence-transformers/all-MiniLM-L6-v2", {}),
+]
+
+# Minimum parity for the run to pass, per task
+PARITY_THRESHOLDS = {
+    "text-classification": 0.95,
+    "question-answering": 0.90,
+    "ner": 0.90,
+    "embeddings": 0.98,
+}
+
+
+def sample_clauses(count):
+    pieces = []
+    for path in sorted((BASE_DIR / "ocr_output").glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        pieces.extend(" ".join(p.split())[:1200] for p in re.split(r"\n\s*\n", text) if len(p.split()) >= 25)
+    return pieces[:count]
+
+
+def _rss_mb():
+    import psutil
+    return psutil.Process().memory_info().rss / 1_000_000
+
+
+def _run_one(task, model, call_kwargs, backend, clauses, queue):
+    """Child process: load one model on one backend, time it, return its outputs."""
+    os.environ["ONNX_MODELS"] = model if backend == "onnx" else ""
+    from routers.onnx_backend import load_pipeline, load_embeddings
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    if task == "embeddings":
+        runner = load_embeddings(model)
+        call = lambda text: runner.embed_query(text)
+    else:
+        runner = load_pipeline(task, model=model)
+        if task == "question-answering":
+            call = lambda text: runner(question="What is this clause about?", context=text)
+        else:
+            call = lambda text: runner(text[:2000], **call_kwargs)
+    load_time = time.perf_counter() - start
+
+    call(clauses[0])  # warm-up
+    outputs, latencies = [], []
+    for text in clauses:
+        start = time.perf_counter()
+        outputs.append(call(text))
+        latencies.append(time.perf_counter() - start)
+
+    queue.put({
+        "load_s": load_time,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "rss_mb": _rss_mb() - rss_before,
+        "outputs": outputs,
+    })
+
+
+def run_isolated(task, model, call_kwargs, backend, clauses):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_one, args=(task, model, call_kwargs, backend, clauses, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def parity(task, reference, candidate):
+    if task == "embeddings":
+        import numpy as np
+        a, b = np.asarray(reference), np.asarray(candidate)
+        cos = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+        return float(cos.mean())
+    if task == "text-classification":
+        same = [r[0]["label"] == c[0]["label"] for r, c in zip(reference, candidate)]
+    elif task == "question-answering":
+        same = [r["answer"].strip() == c["answer"].strip() for r, c in zip(reference, candidate)]
+    elif task == "ner":
+        key = lambda ents: {(e["entity_group"], e["word"]) for e in ents}
+        same = [key(r) == key(c) for r, c in zip(reference, candidate)]
+    else:
+        field = "summary_text" if task == "summarization" else "generated_text"
+        same = [r[0][field].strip() == c[0][field].strip() for r, c in zip(reference, candidate)]
+    return sum(same) / len(same)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=32)
+    parser.add_argument("--models", default="", help="comma-separated subset of model ids")
+    args = parser.parse_args()
+
+    clauses = sample_clauses(args.clauses)
+    wanted = {m.strip() for m in args.models.split(",") if m.strip()}
+    failures = 0
+
+    print(f"{len(clauses)} sample clauses")
+    print(f"{'model':<42}{'backend':<9}{'load s':>8}{'p50 ms':>9}{'RSS MB':>9}{'parity':>9}")
+    for task, model, call_kwargs in MODELS:
+        if wanted and model not in wanted:
+            continue
+        torch_result = run_isolated(task, model, call_kwargs, "torch", clauses)
+        onnx_result = run_isolated(task, model, call_kwargs, "onnx", clauses)
+        score = parity(task, torch_result["outputs"], onnx_result["outputs"])
+        threshold = PARITY_THRESHOLDS.get(task)
+        ok = threshold is None or score >= threshold
+        failures += not ok
+
+        for backend, result in (("torch", torch_result), ("onnx", onnx_result)):
+            shown = f"{score:.3f}" if backend == "onnx" else ""
+            print(f"{model:<42}{backend:<9}{result['load_s']:>8.1f}{result['p50_ms']:>9.1f}{result['rss_mb']:>9.0f}{shown:>9}")
+        print(f"{'':<42}speedup {torch_result['p50_ms'] / onnx_result['p50_ms']:.2f}x"
+              f"{'' if ok else f'  PARITY BELOW {threshold}'}")
+
+    if failures:
+        raise SystemExit(f"{failures} model(s) below their parity threshold")
+
+
+if __name__ == "__main__":
+    main()
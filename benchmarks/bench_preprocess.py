@@ -0,0 +1,85 @@
+"""
+Golden-output check and throughput benchmark for TextProcessor.preprocess_text.
+
+Run from the project root:
+    python -m benchmarks.bench_preprocess [--mb 2] [--repeat 5]
+
+The reference implementation below is the chained replace/re.sub version that
+preprocess_text replaced; both must produce byte-identical output on every
+OCR sample, on the regulation corpus, and on a synthetic document of --mb MB.
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+from routers.clause_matching import TextProcessor
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def reference_preprocess_text(text):
+    text = text.replace("ﬁ", "fi").replace("ﬀ", "ff").replace("—", "--").replace("–", "-")
+    text = text.replace("“", "\"").replace("”", "\"").replace("‘", "'").replace("’", "'")
+    text = text.replace("…", "...")
+    text = text.replace("®", "").replace("©", "")
+    text = re.sub(r"\\", "", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"(\w)-\s*(\w)", r"\1\2", text)
+    text = re.sub(
+        r"(?:(Section|Clause|Article)?\s*)?(\d+(?:\.\d+)*)[\.\)]?\s*[:-]?\s*(.*)",
+        r"\n\1 \2: \3\n",
+        text,
+        flags=re.IGNORECASE
+    )
+    text = text.replace("1. Pre-Award", "\n1. Pre-Award:\n")
+    text = text.replace("2. Award", "\n2. Award:\n")
+    text = text.replace("3. Post-Award", "\n3. Post-Award:\n")
+    text = text.replace("4. Closeout", "\n4. Closeout:\n")
+    text = re.sub(r"Proprietary", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\n\s*\n+", "\n\n", text)
+    return text.strip()
+
+
+def best_of(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=2.0, help="size of the synthetic document")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    processor = TextProcessor()
+    samples = sorted((BASE_DIR / "ocr_output").glob("*.txt")) + sorted((BASE_DIR / "clause_compliance").glob("*.txt"))
+    texts = {p.name: p.read_text(encoding="utf-8") for p in samples}
+
+    # Synthetic document: every OCR sample plus each special character, tiled to size
+    seed = "".join(texts[p.name] for p in samples if p.parent.name == "ocr_output")
+    seed += " “quoted” — dash – ﬁle ﬀ … ® © back\\slash Proprietary 2. Award 4. Closeout a-b-c "
+    size = int(args.mb * 1_000_000)
+    texts[f"synthetic_{args.mb:g}MB"] = (seed * (size // len(seed) + 1))[:size]
+
+    mismatches = 0
+    print(f"{'document':<45}{'MB':>8}{'reference MB/s':>16}{'current MB/s':>14}  golden")
+    for name, text in texts.items():
+        expected = reference_preprocess_text(text)
+        ok = processor.preprocess_text(text) == expected
+        mismatches += not ok
+        mb = len(text.encode("utf-8")) / 1_000_000
+        ref_time = best_of(reference_preprocess_text, text, args.repeat)
+        new_time = best_of(processor.preprocess_text, text, args.repeat)
+        print(f"{name:<45}{mb:>8.2f}{mb / ref_time:>16.1f}{mb / new_time:>14.1f}  {'ok' if ok else 'MISMATCH'}")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} document(s) differ from the reference output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+BM25, dense and fused (hybrid) retrieval over the section-aware FAR/DFARS index.
+
+Run from the project root:
+    python -m benchmarks.bench_regulation_retrieval [--queries 200] [--words 25] [--k 4]
+
+Each query is a run of --words consecutive words from a random passage, with
+its section number removed; a query scores a hit@k when a passage of its own
+section is in the top k. The last row times exact section lookups (the query
+names the section), which never touch the rankers. The first run embeds the
+whole regulation text; later runs load the cached passage embeddings.
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBEDDING_MODEL, REGULATION_PASSAGE_WORDS
+from routers.onnx_backend import load_embeddings, embeddings_backend
+from routers.regulation_corpus import RegulationCorpus
+from routers.regulation_index import RegulationIndex, _top
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--regulations", default=str(BASE_DIR / "clause_compliance"))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--words", type=int, default=25)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = RegulationCorpus(args.regulations)
+    passages = corpus.passages(REGULATION_PASSAGE_WORDS)
+    # Same version id as ClauseValidation's hybrid index, so the embeddings are shared
+    version = corpus.version("hybrid", REGULATION_PASSAGE_WORDS, EMBEDDING_MODEL, embeddings_backend(EMBEDDING_MODEL))
+    index = RegulationIndex.from_passages(passages, load_embeddings(EMBEDDING_MODEL), version)
+    print(f"{len(index.passages)} passages in {len(index.sections)} sections, built in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(0)
+    samples = []
+    for passage in rng.sample([p for p in index.passages if len(p["text"].split()) > args.words], args.queries):
+        words = passage["text"].split()
+        offset = rng.randrange(len(words) - args.words + 1)
+        query = " ".join(w for w in words[offset:offset + args.words] if passage["section_id"] not in w)
+        samples.append((query, passage["section_id"]))
+
+    def dense(query):
+        vector = np.asarray(index.embedder.embed_documents([query])[0], dtype=np.float32)
+        return [int(i) for i in _top(index.vectors @ (vector / np.linalg.norm(vector)), args.k)]
+
+    rankers = {
+        "bm25": lambda q: [int(i) for i in _top(index.bm25.scores(q), args.k, floor=0.0)],
+        "dense": dense,
+        "hybrid": lambda q: [i for i, _ in index.search(q, k=args.k)],
+    }
+    print(f"\n{'ranker':<10}{'hit@' + str(args.k):>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, rank in rankers.items():
+        timings, hits = [], 0
+        for query, section_id in samples:
+            start = time.perf_counter()
+            found = rank(query)
+            timings.append(time.perf_counter() - start)
+            hits += any(index.passages[i]["section_id"] == section_id for i in found)
+        timings.sort()
+        print(f"{name:<10}{hits / len(samples):>8.3f}{statistics.median(timings) * 1000:>9.2f}"
+              f"{timings[int(0.95 * (len(timings) - 1))] * 1000:>9.2f}")
+
+    timings = []
+    for _, section_id in samples:
+        start = time.perf_counter()
+        index.cited_sections(f"Clause incorporates {section_id} by reference.")
+        found = index.section_passages(section_id)[:args.k]
+        timings.append(time.perf_counter() - start)
+        assert found
+    timings.sort()
+    print(f"{'section':<10}{1.0:>8.3f}{statistics.median(timings) * 1000:>9.3f}"
+          f"{timings[int(0.95 * (len(timings) - 1))] * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
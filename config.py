@@ -11,6 +11,63 @@ UPLOAD_FOLDER = Path(os.getenv("UPLOAD_FOLDER", "./new_contract_uploads"))
 CLAUSE_FILE =Path(os.getenv("CLAUSE_FILE","./clause_output/Contract_2_ocr_enriched_validated.json"))
 TESSERACT_PATH = Path(os.getenv("TESSERACT_PATH", "C:/Users/lavan/AppData/Local/Programs/Tesseract-OCR/tesseract.exe"))
 POPPLER_PATH=Path(os.getenv("POPPLER_PATH","C:/Program Files/poppler-24.07.0/Library/bin"))
+# Optional shared SQLite file for the dashboard response cache (multi-worker setups)
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB") or None
+# Clause-type rule sets shared by clause matching and clause validation
+CLAUSE_RULES_FILE = Path(os.getenv("CLAUSE_RULES_FILE", Path(__file__).resolve().parent / "clause_compliance" / "clause_type_rules.json"))
+# Sentence-transformer used for FAR/DFARS retrieval and centroid clause typing
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# ClauseProcessor.transformer_type: "mnli" (roberta-large-mnli) or "centroid" (embedding nearest-centroid)
+CLAUSE_CLASSIFIER_MODE = os.getenv("CLAUSE_CLASSIFIER_MODE", "mnli")
+CLAUSE_CENTROID_MIN_SCORE = float(os.getenv("CLAUSE_CENTROID_MIN_SCORE", "0.2"))
+# ONNX Runtime backend: models (HF ids, comma-separated, or "*") to run as ONNX instead of PyTorch
+ONNX_MODELS = [m.strip() for m in os.getenv("ONNX_MODELS", "").split(",") if m.strip()]
+ONNX_CACHE_DIR = Path(os.getenv("ONNX_CACHE_DIR", "./onnx_models"))
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() in ("1", "true", "yes")
+# Instruction set the int8 kernels target: avx2, avx512, avx512_vnni or arm64
+ONNX_QUANT_ARCH = os.getenv("ONNX_QUANT_ARCH", "avx2")
+# CPU inference parallelism. Intra-op threads are what one model call may use;
+# INFERENCE_POOLS bounds how many calls of each kind run at once ("name:workers,...").
+INFERENCE_INTRA_OP_THREADS = int(os.getenv("INFERENCE_INTRA_OP_THREADS", "0"))  # 0 = cores / total pool workers
+INFERENCE_INTER_OP_THREADS = int(os.getenv("INFERENCE_INTER_OP_THREADS", "1"))
+INFERENCE_POOLS = dict(
+    (name.strip(), int(workers))
+    for name, workers in (item.split(":") for item in os.getenv(
+        "INFERENCE_POOLS", "clause_matching:2,clause_validation:1,metadata:1"
+    ).split(",") if item.strip())
+)
+# Clause summaries: "abstractive" (distilbart) or "extractive" (first sentence, no model call)
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "abstractive")
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", "128"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "4096"))
+# ClauseProcessor.validate_clause: "rules" (risk-signal rule set) or "llm" (LLMChain prompt, slow)
+CLAUSE_VALIDATION_MODE = os.getenv("CLAUSE_VALIDATION_MODE", "rules")
+# ContractMetadataExtractor NER scope: "regions" (preamble, parties, signature, money/date context) or "full"
+METADATA_EXTRACTION_MODE = os.getenv("METADATA_EXTRACTION_MODE", "regions")
+# NER chunking: chunk length and overlap in model tokens (BERT max is 512), chunks per forward batch
+NER_CHUNK_TOKENS = int(os.getenv("NER_CHUNK_TOKENS", "400"))
+NER_CHUNK_OVERLAP = int(os.getenv("NER_CHUNK_OVERLAP", "64"))
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "8"))
+# Clause similarity index: storage folder; exact search below the threshold, clustered (IVF) above it
+CLAUSE_INDEX_DIR = Path(os.getenv("CLAUSE_INDEX_DIR", "./clause_index"))
+CLAUSE_INDEX_ANN_THRESHOLD = int(os.getenv("CLAUSE_INDEX_ANN_THRESHOLD", "200000"))
+CLAUSE_INDEX_NPROBE = int(os.getenv("CLAUSE_INDEX_NPROBE", "8"))
+# Near-duplicate clauses (MinHash/LSH) reuse a canonical clause's enrichment above this Jaccard similarity
+# (off by default: duplicates get the canonical's summary / labels instead of their own)
+CLAUSE_DEDUP = os.getenv("CLAUSE_DEDUP", "false").lower() in ("1", "true", "yes")
+CLAUSE_DEDUP_THRESHOLD = float(os.getenv("CLAUSE_DEDUP_THRESHOLD", "0.9"))
+CLAUSE_DEDUP_SHINGLE_WORDS = int(os.getenv("CLAUSE_DEDUP_SHINGLE_WORDS", "3"))
+# In-process entries kept in front of the shared FAR/DFARS retrieval cache table
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "4096"))
+# Entries of other regulation index builds are dropped once unused for this many days
+RETRIEVAL_CACHE_RETENTION_DAYS = int(os.getenv("RETRIEVAL_CACHE_RETENTION_DAYS", "30"))
+# FAR/DFARS retrieval: "hybrid" (section-aware BM25 + dense, fused) or "dense" (token windows in Chroma)
+REGULATION_RETRIEVAL = os.getenv("REGULATION_RETRIEVAL", "hybrid")
+# Hybrid index: passage length in words, candidates taken from each ranking before fusion, embedding cache folder
+REGULATION_PASSAGE_WORDS = int(os.getenv("REGULATION_PASSAGE_WORDS", "300"))
+REGULATION_FUSION_DEPTH = int(os.getenv("REGULATION_FUSION_DEPTH", "50"))
+REGULATION_INDEX_DIR = Path(os.getenv("REGULATION_INDEX_DIR", "./regulation_index"))
 # Ensure folders exist
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -1,13 +1,17 @@
 from fastapi import APIRouter
-from fastapi import HTTPException
+from fastapi import HTTPException, Query
 import sqlite3
 import csv
 from fastapi.responses import StreamingResponse
 from io import StringIO
+from typing import Optional
+
+from routers.inference_runtime import runtime_settings
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 DB_PATH = "contracts.db"
+EXPORT_CHUNK_SIZE = 5000
 
 @router.put("/users/{user_id}/role")
 def update_user_role(user_id: int, new_role: str):
@@ -18,22 +22,65 @@ def update_user_role(user_id: int, new_role: str):
         conn.commit()
     return {"message": f"Role for user {user_id} updated to '{new_role}'"}
 
+def _iter_audit_log_csv(query: str, values: list):
+    """
+    Yield the export as CSV text one cursor chunk at a time, so memory stays
+    flat no matter how many audit rows match.
+    """
+    # StreamingResponse pulls each chunk from a threadpool worker, so the
+    # connection is used from more than one (never concurrently).
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, values)
+
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["Timestamp", "User", "Action", "AI Decision", "Confidence", "Details", "Category"])
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        conn.close()
+
 @router.get("/admin/audit-logs/export")
-def export_logs_as_csv():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT users.username, audit_logs.action, audit_logs.ai_decision, audit_logs.status, audit_logs.timestamp
-        FROM audit_logs JOIN users ON audit_logs.user_id = users.id
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Username", "Action", "AI Decision", "Status", "Timestamp"])
-    for row in rows:
-        writer.writerow(row)
-
-    output.seek(0)
-    return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=audit_logs.csv"})
\ No newline at end of file
+def export_logs_as_csv(
+    start: Optional[str] = Query(None, description="Inclusive lower bound, e.g. 2025-01-20 or 2025-01-20 09:00:00"),
+    end: Optional[str] = Query(None, description="Exclusive upper bound, same format as start"),
+    category: Optional[str] = Query(None)
+):
+    # Range and category filters are served by idx_audit_logs_timestamp_category.
+    query = """
+        SELECT timestamp, user, action, aiDecision, confidence, details, category
+        FROM audit_logs
+        WHERE 1=1
+    """
+    values = []
+    if start:
+        query += " AND timestamp >= ?"
+        values.append(start)
+    if end:
+        query += " AND timestamp < ?"
+        values.append(end)
+    if category:
+        query += " AND category = ?"
+        values.append(category)
+    query += " ORDER BY timestamp"
+
+    return StreamingResponse(
+        _iter_audit_log_csv(query, values),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=audit_logs.csv"}
+    )
+
+@router.get("/admin/inference-runtime")
+def get_inference_runtime():
+    """Thread counts and inference pool sizes this worker process is running with."""
+    return runtime_settings()
@@ -0,0 +1,160 @@
+import os
+import re
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from config import DB_PATH, EMBEDDING_MODEL
+
+
+# ──────────────────────────────────────────────────────────────────
+# Nearest-centroid clause typing
+#
+# Each clause type gets a centroid: the normalised mean embedding of
+# its example texts (clause template paragraphs + playbook standard
+# clauses). A batch of clauses is embedded once and scored against
+# every centroid with a single matrix multiply.
+# ──────────────────────────────────────────────────────────────────
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "clauses"
+
+# Clause type each clause template exemplifies
+TEMPLATE_CLAUSE_TYPES = {
+    "nda_standard": "Confidentiality",
+    "termination_standard": "Termination",
+    "payment_standard": "Payment",
+    "governing_laws": "Governing Law",
+    "dispute_resolution": "Dispute Resolution",
+    "force_majeure": "Force Majeure",
+    "intellectual_property": "Intellectual Property",
+    "gdpr": "Data Protection",
+    "amendments": "Amendments",
+    "service_standard": "Services",
+}
+
+# Playbook clause_type values that name one of the labels above differently
+PLAYBOOK_ALIASES = {
+    "Payment Terms": "Payment",
+}
+
+# Every label also gets a short description, so types without a template
+# (Indemnity) still have a centroid.
+LABEL_DESCRIPTIONS = {
+    "Confidentiality": "Confidentiality and non-disclosure of confidential information.",
+    "Termination": "Termination of the agreement, notice of termination and termination for default.",
+    "Payment": "Payment terms, invoices, fees and compensation.",
+    "Governing Law": "Governing law and jurisdiction of the agreement.",
+    "Indemnity": "Indemnification, hold harmless and limitation of liability.",
+    "Dispute Resolution": "Resolution of disputes by negotiation, mediation or arbitration.",
+    "Force Majeure": "Force majeure events beyond the reasonable control of the parties.",
+    "Intellectual Property": "Ownership and licensing of intellectual property and work product.",
+    "Data Protection": "Protection and processing of personal data and privacy.",
+    "Amendments": "Amendments and modifications to the agreement in writing.",
+    "Services": "Scope of services, deliverables and performance standards.",
+}
+
+JINJA_PATTERN = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.S)
+MIN_EXAMPLE_CHARS = 60
+
+
+def _template_paragraphs(path: Path) -> List[str]:
+    text = JINJA_PATTERN.sub("", path.read_text(encoding="utf-8"))
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", text):
+        block = " ".join(block.split())
+        if len(block) >= MIN_EXAMPLE_CHARS and not block.startswith("-----"):
+            paragraphs.append(block)
+    return paragraphs
+
+
+def load_label_examples(template_dir: Path = TEMPLATE_DIR, db_path=DB_PATH) -> Dict[str, List[str]]:
+    """Example texts per clause type from the clause templates and the playbook table."""
+    examples = defaultdict(list)
+    for label, description in LABEL_DESCRIPTIONS.items():
+        examples[label].append(description)
+
+    # Boilerplate shared by several templates (party recitals, signature
+    # blocks) says nothing about the clause type, so it is dropped.
+    per_template = {}
+    for name, label in TEMPLATE_CLAUSE_TYPES.items():
+        path = Path(template_dir) / f"{name}.jinja"
+        if path.exists():
+            per_template[label] = _template_paragraphs(path)
+    seen = defaultdict(int)
+    for paragraphs in per_template.values():
+        for paragraph in set(paragraphs):
+            seen[paragraph] += 1
+    for label, paragraphs in per_template.items():
+        examples[label].extend(p for p in paragraphs if seen[p] == 1)
+
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute("SELECT clause_type, standard_clause FROM clause_playbook").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            conn.close()
+        for clause_type, standard_clause in rows:
+            label = PLAYBOOK_ALIASES.get(clause_type, clause_type)
+            # Only known types; placeholder rows carry no signal
+            if label in LABEL_DESCRIPTIONS and standard_clause and not standard_clause.startswith("Standard clause for"):
+                examples[label].append(standard_clause)
+
+    return dict(examples)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class CentroidClassifier:
+    def __init__(self, embedder, examples: Dict[str, Sequence[str]], min_score: float = 0.0, default: str = "Uncategorized"):
+        """
+        `embedder` is any LangChain Embeddings object (embed_documents).
+        Clauses scoring below `min_score` against every centroid get `default`.
+        """
+        self.embedder = embedder
+        self.min_score = min_score
+        self.default = default
+        self.labels = [label for label, texts in examples.items() if texts]
+
+        texts, owners = [], []
+        for i, label in enumerate(self.labels):
+            texts.extend(examples[label])
+            owners.extend([i] * len(examples[label]))
+        vectors = _normalize(np.asarray(embedder.embed_documents(texts), dtype=np.float32))
+
+        owners = np.asarray(owners)
+        centroids = np.stack([vectors[owners == i].mean(axis=0) for i in range(len(self.labels))])
+        self.centroids = _normalize(centroids)
+
+    def scores(self, texts: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of every text to every centroid, shape (len(texts), len(labels))."""
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        vectors = _normalize(np.asarray(self.embedder.embed_documents(list(texts)), dtype=np.float32))
+        return vectors @ self.centroids.T
+
+    def classify_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        scores = self.scores(texts)
+        best = scores.argmax(axis=1) if len(scores) else []
+        return [
+            (self.labels[j], float(scores[i, j])) if scores[i, j] >= self.min_score else (self.default, float(scores[i, j]))
+            for i, j in enumerate(best)
+        ]
+
+    def classify(self, text: str) -> str:
+        return self.classify_batch([text])[0][0]
+
+
+def build_centroid_classifier(embedder=None, min_score: float = 0.0, db_path=DB_PATH) -> CentroidClassifier:
+    if embedder is None:
+        from routers.onnx_backend import shared_embeddings
+        embedder = shared_embeddings(EMBEDDING_MODEL)
+    return CentroidClassifier(embedder, load_label_examples(db_path=db_path), min_score=min_score)
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import mmh3
+import numpy as np
+
+from config import DB_PATH, CLAUSE_DEDUP_THRESHOLD, CLAUSE_DEDUP_SHINGLE_WORDS
+from sqlite_db import create_clause_dedup_tables
+
+
+# ──────────────────────────────────────────────────────────────────
+# Near-duplicate clauses
+#
+# Contracts built from the same templates repeat the same clauses with
+# small edits. Each clause is shingled into word n-grams and reduced
+# to a 128-value MinHash signature; the signature is split into 16
+# bands of 8 rows, and clauses sharing any band bucket are candidates
+# (the LSH S-curve turns over at Jaccard ~0.7). A candidate whose
+# estimated Jaccard is at least CLAUSE_DEDUP_THRESHOLD is the same
+# clause: its canonical's enrichment (model type, summary, validation)
+# is reused instead of running the models again, provided it was
+# produced by the same enrichment config (classifier, summary and
+# validation modes and models): changing any of them makes the old
+# canonicals misses, counted as `stale` in the report.
+# ──────────────────────────────────────────────────────────────────
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+_PRIME = (1 << 32) + 15            # > every 32-bit shingle hash
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+# Enrichment field a canonical clause carries for each stage; rule_based_type is a regex, always recomputed
+CACHED_FIELDS = {"classify": "transformer_type", "summarize": "summary", "validate": "validation"}
+
+_WORD = re.compile(r"\w+")
+_rng = np.random.default_rng(1)
+# a, b < 2**31 keep a * h + b inside uint64 for 32-bit h
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = CLAUSE_DEDUP_SHINGLE_WORDS) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    hashes = np.fromiter((mmh3.hash(s, signed=False) for s in shingles(text)), dtype=np.uint64)
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % np.uint64(_PRIME) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit bucket id per band (fits an SQLite INTEGER)."""
+    return [
+        mmh3.hash64(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())[0]
+        for band in range(BANDS)
+    ]
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class DedupReport:
+    """Counts for one batch (an upload, or one file of a pipeline run)."""
+
+    def __init__(self):
+        self.clauses = 0
+        self.duplicates = 0          # served from a canonical clause
+        self.new_canonicals = 0
+        self.stale = 0               # matched a canonical enriched under another config
+        self.enrich_seconds = 0.0    # model time actually spent
+        self.seconds_saved = 0.0     # model time the reused canonicals originally cost
+
+    @property
+    def dedup_ratio(self) -> float:
+        return self.duplicates / self.clauses if self.clauses else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "clauses": self.clauses,
+            "duplicates": self.duplicates,
+            "new_canonicals": self.new_canonicals,
+            "stale": self.stale,
+            "dedup_ratio": round(self.dedup_ratio, 3),
+            "enrich_seconds": round(self.enrich_seconds, 2),
+            "seconds_saved": round(self.seconds_saved, 2),
+        }
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ClauseDeduplicator:
+    def __init__(self, threshold: float = CLAUSE_DEDUP_THRESHOLD, db_path=DB_PATH):
+        self.threshold = threshold
+        self.db_path = db_path
+        with self._connect() as conn:
+            create_clause_dedup_tables(conn.cursor())
+
+    def _connect(self):
+        # Pipeline workers in several processes share the tables
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    # ─────────────── lookup ───────────────
+    def find_canonical(self, conn, signature: np.ndarray, buckets: Sequence[int],
+                       config_hash: str, report: Optional[DedupReport] = None) -> Optional[Dict[str, Any]]:
+        candidates = set()
+        for band, bucket in enumerate(buckets):
+            candidates.update(
+                cid for (cid,) in conn.execute(
+                    "SELECT canonical_id FROM clause_lsh WHERE band = ? AND bucket = ?", (band, bucket)
+                )
+            )
+        best, best_score, stale = None, self.threshold, False
+        for cid in candidates:
+            row = conn.execute(
+                "SELECT signature, enrichment_json, enrich_seconds, config_hash FROM clause_canonical WHERE id = ?", (cid,)
+            ).fetchone()
+            score = estimated_jaccard(signature, np.frombuffer(row[0], dtype=np.uint32))
+            if score >= self.threshold and row[3] != config_hash:
+                stale = True
+                continue
+            if score >= best_score:
+                best = {"id": cid, "enrichment": json.loads(row[1]), "enrich_seconds": row[2], "similarity": score}
+                best_score = score
+        if best is None and stale and report is not None:
+            report.stale += 1
+        return best
+
+    def _insert_canonical(self, conn, text, signature, buckets, enrichment, enrich_seconds, config_hash) -> int:
+        cursor = conn.execute(
+            """INSERT INTO clause_canonical (text_hash, config_hash, text, signature, enrichment_json, enrich_seconds)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(text_hash, config_hash) DO UPDATE SET duplicates = duplicates + 1
+               RETURNING id""",
+            (hashlib.sha1(text.encode("utf-8")).hexdigest(), config_hash, text, signature.tobytes(),
+             json.dumps(enrichment), enrich_seconds),
+        )
+        cid = cursor.fetchone()[0]
+        conn.executemany(
+            "INSERT OR IGNORE INTO clause_lsh (band, bucket, canonical_id) VALUES (?, ?, ?)",
+            [(band, bucket, cid) for band, bucket in enumerate(buckets)],
+        )
+        return cid
+
+    # ─────────────── enrichment ───────────────
+    def enrich(self, processor, clauses, metadata=None, stages=None, report: Optional[DedupReport] = None):
+        """
+        processor.enrich_clauses semantics, with near-duplicates of known
+        (or earlier in this batch) clauses served from their canonical.
+        """
+        clauses = list(clauses)
+        stages = set(CACHED_FIELDS) if stages is None else set(stages)
+        wanted = [field for stage, field in CACHED_FIELDS.items() if stage in stages]
+        report = report if report is not None else DedupReport()
+        report.clauses += len(clauses)
+        config_hash = config_fingerprint(processor.enrichment_config())
+
+        signatures = [minhash(c["text"]) for c in clauses]
+        buckets = [band_buckets(s) for s in signatures]
+
+        # 1) map every clause to a stored canonical, an earlier clause of
+        #    this batch, or itself (a new canonical)
+        owners: List[Any] = []
+        local_buckets: Dict[tuple, List[int]] = {}
+        with self._connect() as conn:
+            for i, (signature, clause_buckets) in enumerate(zip(signatures, buckets)):
+                owner = self.find_canonical(conn, signature, clause_buckets, config_hash, report)
+                if owner is None:
+                    local = {j for band, b in enumerate(clause_buckets) for j in local_buckets.get((band, b), ())}
+                    scored = [(estimated_jaccard(signature, signatures[j]), j) for j in local]
+                    score, j = max(scored, default=(0.0, None))
+                    owner = j if j is not None and score >= self.threshold else None
+                if owner is None:
+                    for band, b in enumerate(clause_buckets):
+                        local_buckets.setdefault((band, b), []).append(i)
+                owners.append(owner)
+
+        # 2) run the models once per new canonical
+        fresh = [i for i, owner in enumerate(owners) if owner is None]
+        started = time.perf_counter()
+        fresh_enriched = processor.enrich_batch([clauses[i] for i in fresh], metadata=metadata, stages=stages)
+        spent = time.perf_counter() - started
+        per_clause = spent / len(fresh) if fresh else 0.0
+        report.enrich_seconds += spent
+        report.new_canonicals += len(fresh)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(clauses)
+        for i, enriched in zip(fresh, fresh_enriched):
+            results[i] = enriched
+
+        # 3) duplicates take the cached fields; stages the canonical never ran are filled in now
+        with self._connect() as conn:
+            for i, enriched in zip(fresh, fresh_enriched):
+                cached = {field: enriched.get(field) for field in CACHED_FIELDS.values()}
+                self._insert_canonical(conn, clauses[i]["text"], signatures[i], buckets[i], cached, per_clause, config_hash)
+
+            for i, owner in enumerate(owners):
+                if owner is None:
+                    continue
+                if isinstance(owner, dict):
+                    cached, cost = owner["enrichment"], owner["enrich_seconds"] or 0.0
+                else:
+                    cached, cost = results[owner], per_clause
+                started = time.perf_counter()
+                results[i] = processor.enrich_clause(
+                    clauses[i], metadata=metadata, stages=stages, **{field: cached.get(field) for field in wanted}
+                )
+                report.enrich_seconds += time.perf_counter() - started
+                report.duplicates += 1
+                report.seconds_saved += cost
+                if isinstance(owner, dict):
+                    filled = dict(cached)
+                    filled.update((field, results[i][field]) for field in wanted)
+                    conn.execute(
+                        "UPDATE clause_canonical SET duplicates = duplicates + 1, enrichment_json = ? WHERE id = ?",
+                        (json.dumps(filled), owner["id"]),
+                    )
+        return results
@@ -0,0 +1,367 @@
+"""
+Clause vector index: one embedding per enriched clause, searchable across
+every contract.
+
+    python -m routers.clause_index --input clause_output
+
+indexes every *_enriched.json / *_enriched.jsonl file in the folder;
+clauses already in the index are skipped, so re-running only appends what
+is new. The index is re-clustered afterwards when it is due (or always,
+with --train).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config import CLAUSE_INDEX_DIR, CLAUSE_INDEX_ANN_THRESHOLD, CLAUSE_INDEX_NPROBE
+
+
+# ──────────────────────────────────────────────────────────────────
+# Storage
+#
+#   vectors.f32   row-major float32 matrix, L2-normalised rows, read
+#                 through np.memmap; new clauses are written after the
+#                 last row
+#   lists.i32     coarse cluster of every row (approximate search only)
+#   centroids.npy coarse cluster centres
+#   ids.db        SQLite: row -> clause fields, plus index metadata
+#
+# SQLite is the source of truth for the row count: vectors are written
+# first and the rows committed after, so a crash in between leaves
+# trailing bytes that are ignored (and overwritten by the next append).
+#
+# Below CLAUSE_INDEX_ANN_THRESHOLD rows search is an exact matmul over
+# the memmap. Above it the rows are clustered (spherical k-means,
+# ~sqrt(n) lists) and a query scores only the rows in its
+# CLAUSE_INDEX_NPROBE nearest lists. Clustering runs from the command
+# line or on a background thread (train_in_background), never inside
+# the add() a request makes.
+# ──────────────────────────────────────────────────────────────────
+
+KMEANS_SAMPLE = 50_000
+KMEANS_ITERATIONS = 10
+ASSIGN_BLOCK = 65_536
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def clause_key(clause: Dict[str, Any]) -> str:
+    raw = "\x1f".join(str(clause.get(field) or "") for field in ("source_file", "clause_id", "text"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _clause_text(clause: Dict[str, Any]) -> str:
+    return (clause.get("text") or clause.get("clause_text") or "").strip()
+
+
+class ClauseIndex:
+    def __init__(self, embedder, directory=CLAUSE_INDEX_DIR,
+                 ann_threshold: int = CLAUSE_INDEX_ANN_THRESHOLD, nprobe: int = CLAUSE_INDEX_NPROBE):
+        """`embedder` is any LangChain Embeddings object (embed_documents / embed_query)."""
+        self.embedder = embedder
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / "vectors.f32"
+        self.lists_path = self.directory / "lists.i32"
+        self.centroids_path = self.directory / "centroids.npy"
+        self.db_path = self.directory / "ids.db"
+        self.ann_threshold = ann_threshold
+        self.nprobe = max(1, nprobe)
+
+        self._lock = threading.Lock()
+        self._matrix = None      # memmap over the committed rows
+        self._lists = None
+        self._centroids = None
+        self._loaded = None      # (rows, centroids mtime) the arrays above reflect
+        self._training = None    # background train() thread
+        self._training_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS clause_vectors (
+                    row INTEGER PRIMARY KEY,
+                    clause_key TEXT NOT NULL UNIQUE,
+                    source_file TEXT,
+                    clause_id TEXT,
+                    title TEXT,
+                    clause_type TEXT,
+                    text TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_clause_vectors_source ON clause_vectors(source_file)")
+            conn.execute("CREATE TABLE IF NOT EXISTS clause_index_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    # ─────────────── bookkeeping ───────────────
+    def _connect(self):
+        # Several workers may append; writers serialise on the SQLite lock
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _meta(conn, key: str, default=None):
+        row = conn.execute("SELECT value FROM clause_index_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    @staticmethod
+    def _set_meta(conn, key: str, value) -> None:
+        conn.execute("INSERT OR REPLACE INTO clause_index_meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM clause_vectors").fetchone()[0]
+
+    def _refresh(self):
+        """(matrix, lists, centroids) for the committed rows, reopened when another writer appended."""
+        rows = len(self)
+        version = (rows, self.centroids_path.stat().st_mtime_ns if self.centroids_path.exists() else None)
+        with self._lock:
+            if version != self._loaded:
+                with self._connect() as conn:
+                    dim = self._meta(conn, "dim")
+                self._matrix = (
+                    np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+                    if rows else np.zeros((0, dim or 0), dtype=np.float32)
+                )
+                self._centroids = np.load(self.centroids_path) if self.centroids_path.exists() else None
+                self._lists = (
+                    np.fromfile(self.lists_path, dtype=np.int32)[:rows]
+                    if self._centroids is not None and self.lists_path.exists() else None
+                )
+                self._loaded = version
+            return self._matrix, self._lists, self._centroids
+
+    # ─────────────── writes ───────────────
+    def add(self, clauses: Iterable[Dict[str, Any]], batch_size: int = 64) -> int:
+        """Embed and append clauses not yet in the index. Returns how many were added."""
+        added = 0
+        batch = []
+        for clause in clauses:
+            if _clause_text(clause):
+                batch.append(clause)
+            if len(batch) == batch_size:
+                added += self._add_batch(batch)
+                batch = []
+        if batch:
+            added += self._add_batch(batch)
+        return added
+
+    def _add_batch(self, clauses: Sequence[Dict[str, Any]]) -> int:
+        keyed = {clause_key(c): c for c in clauses}
+        with self._connect() as conn:
+            marks = ",".join("?" * len(keyed))
+            known = {k for (k,) in conn.execute(f"SELECT clause_key FROM clause_vectors WHERE clause_key IN ({marks})", list(keyed))}
+        fresh = [(k, c) for k, c in keyed.items() if k not in known]
+        if not fresh:
+            return 0
+
+        # Embed outside the write lock; it is the slow part
+        vectors = _normalize(np.asarray(self.embedder.embed_documents([_clause_text(c) for _, c in fresh]), dtype=np.float32))
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            dim = self._meta(conn, "dim")
+            if dim is None:
+                self._set_meta(conn, "dim", vectors.shape[1])
+            elif dim != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({dim}); rebuild it")
+            # Another writer may have added some of these since the check above
+            marks = ",".join("?" * len(fresh))
+            known = {k for (k,) in conn.execute(f"SELECT clause_key FROM clause_vectors WHERE clause_key IN ({marks})", [k for k, _ in fresh])}
+            keep = [i for i, (k, _) in enumerate(fresh) if k not in known]
+            if not keep:
+                conn.rollback()
+                return 0
+            vectors = vectors[keep]
+            fresh = [fresh[i] for i in keep]
+
+            start = conn.execute("SELECT COUNT(*) FROM clause_vectors").fetchone()[0]
+            with open(self.vectors_path, "r+b" if self.vectors_path.exists() else "wb") as f:
+                f.seek(start * vectors.shape[1] * 4)
+                f.write(vectors.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+            if self.centroids_path.exists():
+                self._append_lists(start, vectors)
+
+            conn.executemany(
+                "INSERT INTO clause_vectors (row, clause_key, source_file, clause_id, title, clause_type, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (start + i, key, c.get("source_file"), str(c.get("clause_id")) if c.get("clause_id") is not None else None,
+                     c.get("title"), c.get("transformer_type") or c.get("rule_based_type"), _clause_text(c))
+                    for i, (key, c) in enumerate(fresh)
+                ],
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return len(fresh)
+
+    def _append_lists(self, start: int, vectors: np.ndarray) -> None:
+        # Only extend a lists file that covers every earlier row; rows past
+        # its end are scored exhaustively until the next train()
+        if not self.lists_path.exists() or self.lists_path.stat().st_size < start * 4:
+            return
+        centroids = np.load(self.centroids_path)
+        assignments = (vectors @ centroids.T).argmax(axis=1).astype(np.int32)
+        with open(self.lists_path, "r+b") as f:
+            f.seek(start * 4)
+            f.write(assignments.tobytes())
+            f.truncate()
+
+    # ─────────────── approximate search ───────────────
+    def training_due(self) -> bool:
+        rows = len(self)
+        with self._connect() as conn:
+            trained_rows = self._meta(conn, "trained_rows", 0)
+        # Cluster once the index is big enough, and again each time it doubles
+        return rows >= self.ann_threshold and rows >= 2 * trained_rows
+
+    def train_in_background(self) -> bool:
+        """
+        Start train() on a daemon thread if it is due and no run is under way.
+        Returns whether a run was started; searches keep using the previous
+        clusters (rows added since are scored exactly) until it finishes.
+        """
+        with self._training_lock:
+            if self._training is not None and self._training.is_alive():
+                return False
+            if not self.training_due():
+                return False
+            self._training = threading.Thread(target=self.train, name="clause-index-train", daemon=True)
+            self._training.start()
+        return True
+
+    def train(self, nlist: Optional[int] = None, seed: int = 0) -> int:
+        """(Re)cluster all rows for approximate search. Returns the number of lists."""
+        matrix, _, _ = self._refresh()
+        rows = len(matrix)
+        if rows == 0:
+            return 0
+        nlist = max(1, min(rows, nlist or int(np.sqrt(rows))))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(matrix[np.sort(rng.choice(rows, size=min(rows, KMEANS_SAMPLE), replace=False))])
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            owner = (sample @ centroids.T).argmax(axis=1)
+            for j in range(nlist):
+                members = sample[owner == j]
+                if len(members):
+                    centroids[j] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assignments = np.empty(rows, dtype=np.int32)
+        for start in range(0, rows, ASSIGN_BLOCK):
+            block = np.asarray(matrix[start:start + ASSIGN_BLOCK])
+            assignments[start:start + len(block)] = (block @ centroids.T).argmax(axis=1)
+
+        # Readers may be mid-search: write beside and swap in
+        lists_tmp = self.lists_path.with_suffix(".tmp")
+        assignments.tofile(lists_tmp)
+        centroids_tmp = self.directory / "centroids.tmp.npy"
+        np.save(centroids_tmp, centroids.astype(np.float32))
+        os.replace(lists_tmp, self.lists_path)
+        os.replace(centroids_tmp, self.centroids_path)
+        with self._connect() as conn:
+            self._set_meta(conn, "trained_rows", rows)
+        with self._lock:
+            self._loaded = None
+        return nlist
+
+    # ─────────────── reads ───────────────
+    def search(self, text: str, k: int = 10, exact: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """
+        Top-k indexed clauses by cosine similarity to `text`. Exact below
+        ann_threshold rows (or when exact=True), otherwise approximate.
+        """
+        matrix, lists, centroids = self._refresh()
+        if len(matrix) == 0 or k <= 0:
+            return []
+        query = _normalize(np.asarray([self.embedder.embed_query(text)], dtype=np.float32))[0]
+        if query.shape[0] != matrix.shape[1]:
+            raise ValueError(f"Embedding dimension {query.shape[0]} does not match the index ({matrix.shape[1]})")
+
+        if centroids is None or lists is None:
+            exact = True  # never clustered
+        elif exact is None:
+            exact = len(matrix) < self.ann_threshold
+        if exact:
+            candidates = None
+            scores = np.asarray(matrix @ query)
+        else:
+            probes = np.argsort(-(centroids @ query))[:self.nprobe]
+            candidates = np.flatnonzero(np.isin(lists, probes))
+            # Rows appended after the lists file was last written are always scored
+            candidates = np.concatenate([candidates, np.arange(len(lists), len(matrix))])
+            scores = np.asarray(matrix[candidates] @ query)
+        if len(scores) == 0:
+            return []  # the probed lists are empty
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            marks = ",".join("?" * len(rows))
+            found = {
+                r["row"]: dict(r) for r in conn.execute(
+                    f"SELECT row, source_file, clause_id, title, clause_type, text FROM clause_vectors WHERE row IN ({marks})",
+                    [int(r) for r in rows],
+                )
+            }
+        results = []
+        for row, score in zip(rows, scores[top]):
+            hit = found.get(int(row))
+            if hit:
+                del hit["row"]
+                hit["score"] = round(float(score), 4)
+                results.append(hit)
+        return results
+
+
+# ---------- batch indexing ----------
+def iter_enriched_clauses(folder) -> Iterable[Dict[str, Any]]:
+    for path in sorted(Path(folder).iterdir()):
+        if path.name.endswith("_enriched.jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        elif path.name.endswith("_enriched.json"):
+            with open(path, encoding="utf-8") as f:
+                clauses = json.load(f)
+            if isinstance(clauses, list):
+                yield from clauses
+
+
+if __name__ == "__main__":
+    from routers.onnx_backend import load_embeddings
+    from config import EMBEDDING_MODEL
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="clause_output")
+    parser.add_argument("--train", action="store_true", help="re-cluster for approximate search even if not due")
+    args = parser.parse_args()
+
+    index = ClauseIndex(load_embeddings(EMBEDDING_MODEL))
+    added = index.add(iter_enriched_clauses(args.input))
+    if args.train or index.training_due():
+        print(f"Clustered into {index.train()} lists")
+    print(f"Added {added} clauses; index holds {len(index)}")
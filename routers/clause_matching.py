@@ -3,112 +3,233 @@ import os
 import json
 import uuid
 import datetime
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from transformers import pipeline
+import torch
+from routers.onnx_backend import load_pipeline
 from langchain.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
 from langchain_community.llms import HuggingFacePipeline
+from routers.clause_rules import get_rule_set
+from routers.clause_centroids import build_centroid_classifier
+from routers.clause_dedup import ClauseDeduplicator, DedupReport
+from routers.metadata_index import extract_or_load
+from config import (
+    EMBEDDING_MODEL, CLAUSE_CLASSIFIER_MODE, CLAUSE_CENTROID_MIN_SCORE,
+    SUMMARY_MODE, SUMMARY_BATCH_SIZE, SUMMARY_MAX_INPUT_TOKENS, SUMMARY_CACHE_SIZE,
+    CLAUSE_VALIDATION_MODE, CLAUSE_DEDUP,
+)
 
 # === TextProcessor ===
 class TextProcessor:
+    # OCR/encoding artefacts and the replacement for each one. Applied in a
+    # single pass through one character-class regex (str.translate falls back
+    # to a per-character slow path once mappings expand or delete characters).
+    CHAR_MAP = {
+        "ﬁ": "fi", "ﬀ": "ff", "—": "--", "–": "-",
+        "“": "\"", "”": "\"", "‘": "'", "’": "'",
+        "…": "...",
+        "®": "", "©": "",  # Remove common symbols if not needed
+        "\\": "",          # Stray backslashes from OCR output
+    }
+    CHAR_PATTERN = re.compile("[" + re.escape("".join(CHAR_MAP)) + "]")
+
+    # Hyphen (plus any whitespace) joining two word characters; the word
+    # characters themselves are checked in _join_hyphenated.
+    HYPHEN_PATTERN = re.compile(r"-\s*(?=\w)")
+    SECTION_PATTERN = re.compile(
+        r"(?:(Section|Clause|Article)?\s*)?(\d+(?:\.\d+)*)[\.\)]?\s*[:-]?\s*(.*)",
+        re.IGNORECASE
+    )
+    # Top-level section headers found in our contract examples
+    HEADER_PATTERN = re.compile(r"1\. Pre-Award|2\. Award|3\. Post-Award|4\. Closeout")
+    PROPRIETARY_PATTERN = re.compile(r"Proprietary", re.IGNORECASE)
+    BLANK_LINES_PATTERN = re.compile(r"\n\s*\n+")
+
     def __init__(self):
         pass
 
+    @staticmethod
+    def _collapse_whitespace(text):
+        # Same result as re.sub(r"\s+", " ", text): str.split() uses the same
+        # notion of whitespace, but leading/trailing runs must be put back.
+        parts = text.split()
+        if not parts:
+            return " " if text else ""
+        collapsed = " ".join(parts)
+        if text[0].isspace():
+            collapsed = " " + collapsed
+        if text[-1].isspace():
+            collapsed += " "
+        return collapsed
+
+    @classmethod
+    def _join_hyphenated(cls, text):
+        # Equivalent to re.sub(r"(\w)-\s*(\w)", r"\1\2", text) without trying
+        # the pattern at every word character. As in the original left-to-right
+        # scan, a word character already used as the right side of a join
+        # cannot serve as the left side of the next one ("a-b-c" -> "ab-c").
+        last_joined = -1
+
+        def join(match):
+            nonlocal last_joined
+            start = match.start()
+            if start and start - 1 != last_joined:
+                prev = text[start - 1]
+                if prev.isalnum() or prev == "_":
+                    last_joined = match.end()
+                    return ""
+            return match.group()
+
+        return cls.HYPHEN_PATTERN.sub(join, text)
+
     def preprocess_text(self, text):
-        # 1. Handle common encoding/OCR misinterpretations (often seen in OCR output)
-        text = text.replace("ﬁ", "fi").replace("ﬀ", "ff").replace("—", "--").replace("–", "-")
-        text = text.replace("“", "\"").replace("”", "\"").replace("‘", "'").replace("’", "'")
-        text = text.replace("…", "...")
-        text = text.replace("®", "").replace("©", "") # Remove common symbols if not needed
-
-        # 2. Remove source tags like from OCR output
-        text = re.sub(r"\\", "", text)
-
-        # 3. Collapse multiple whitespace characters into single spaces
-        text = re.sub(r"\s+", " ", text)
-        text = re.sub(r"(\w)-\s*(\w)", r"\1\2", text)
-        text = re.sub(
-            r"(?:(Section|Clause|Article)?\s*)?(\d+(?:\.\d+)*)[\.\)]?\s*[:-]?\s*(.*)",
-            r"\n\1 \2: \3\n",
-            text,
-            flags=re.IGNORECASE
-        )
-        # Further normalization for specific top-level section headers found in your contract example:
-        text = text.replace("1. Pre-Award", "\n1. Pre-Award:\n")
-        text = text.replace("2. Award", "\n2. Award:\n")
-        text = text.replace("3. Post-Award", "\n3. Post-Award:\n")
-        text = text.replace("4. Closeout", "\n4. Closeout:\n")
-        text = re.sub(r"Proprietary", "", text, flags=re.IGNORECASE)
-        text = re.sub(r"\n\s*\n+", "\n\n", text)
+        # 1. Handle common encoding/OCR misinterpretations and remove backslashes
+        char_map = self.CHAR_MAP
+        text = self.CHAR_PATTERN.sub(lambda m: char_map[m.group()], text)
+
+        # 2. Collapse whitespace runs into single spaces, re-join hyphenated words
+        text = self._collapse_whitespace(text)
+        text = self._join_hyphenated(text)
+        text = self.SECTION_PATTERN.sub(r"\n\1 \2: \3\n", text)
+
+        # 3. Further normalization for specific top-level section headers
+        text = self.HEADER_PATTERN.sub(lambda m: "\n" + m.group() + ":\n", text)
+        text = self.PROPRIETARY_PATTERN.sub("", text)
+        text = self.BLANK_LINES_PATTERN.sub("\n\n", text)
         return text.strip()
 
 
 # === ClauseSegmenter ===
+class ClauseRecord:
+    """
+    One segmented clause. Supports the dict-style access the enrichment code
+    uses (clause["text"], clause.get("clause_id")); `start` and `end` are the
+    character offsets of the clause, heading through last body line, in the
+    text that was segmented.
+    """
+    __slots__ = ("clause_id", "title", "text", "section_path", "source_file", "start", "end")
+    FIELDS = ("clause_id", "title", "text", "section_path", "source_file", "start", "end")
+
+    def __init__(self, clause_id, title, text, section_path, source_file, start, end):
+        self.clause_id = clause_id
+        self.title = title
+        self.text = text
+        self.section_path = section_path
+        self.source_file = source_file
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
 class ClauseSegmenter:
     def __init__(self):
         self.clause_heading_pattern = re.compile(
             r'^\s*((Section|Clause|Article)\s*)?(\d+(\.\d+)*|[IVXLCDM]+)[\.\)]?\s+(.+)', re.IGNORECASE
         )
 
-    def segment_clauses(self, text, source_file=None):
-        lines = text.split('\n')
-        segments = []
-        current_clause = None
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
+    @staticmethod
+    def _iter_lines(text):
+        # Lazily yields (stripped_line, start_offset) for every non-blank line,
+        # splitting on "\n" exactly like text.split("\n").
+        pos = 0
+        length = len(text)
+        while pos <= length:
+            newline = text.find("\n", pos)
+            if newline == -1:
+                newline = length
+            raw = text[pos:newline]
+            line = raw.strip()
+            if line:
+                yield line, pos + len(raw) - len(raw.lstrip())
+            pos = newline + 1
+
+    def iter_clauses(self, text, source_file=None):
+        """
+        Yield ClauseRecords in document order. Body lines are collected in a
+        list and joined once when the clause closes.
+        """
+        heading = None      # (clause_id, title, start, is_preamble) of the open clause
+        parts = []
+        end = 0
+
+        for line, offset in self._iter_lines(text):
             match = self.clause_heading_pattern.match(line)
             if match:
-                if current_clause:
-                    segments.append(current_clause)
-
-                clause_id = match.group(3)
-                clause_title = match.group(5)
-
-                current_clause = {
-                    "clause_id": clause_id,
-                    "title": clause_title.strip(),
-                    "text": "",
-                    "section_path": clause_id,
-                    "source_file": source_file
-                }
+                if heading:
+                    yield self._make_record(heading, parts, source_file, end)
+                heading = (match.group(3), match.group(5).strip(), offset, False)
+                parts = []
             else:
-                if current_clause:
-                    current_clause["text"] += " " + line
-                else:
-                    current_clause = {
-                        "clause_id": "0",
-                        "title": "Preamble",
-                        "text": line,
-                        "section_path": "0",
-                        "source_file": source_file
-                    }
-
-        if current_clause:
-            segments.append(current_clause)
+                if heading is None:
+                    # Body text before the first heading forms the preamble
+                    heading = ("0", "Preamble", offset, True)
+                parts.append(line)
+            end = offset + len(line)
+
+        if heading:
+            yield self._make_record(heading, parts, source_file, end)
+
+    @staticmethod
+    def _make_record(heading, parts, source_file, end):
+        clause_id, title, start, is_preamble = heading
+        if is_preamble:
+            text = " ".join(parts)
+        else:
+            # Headed clauses keep the leading space of the original " " + line accumulation
+            text = "".join(" " + part for part in parts)
+        return ClauseRecord(clause_id, title, text, clause_id, source_file, start, end)
 
-        return segments
+    def segment_clauses(self, text, source_file=None):
+        """iter_clauses as a list of dicts, offsets included."""
+        return [record.to_dict() for record in self.iter_clauses(text, source_file=source_file)]
 
 
 # === ClauseProcessor ===
-class ClauseProcessor:
-    def __init__(self, metadata_extractor=None):
-        self.rule_patterns = {
-            "Confidentiality": re.compile(r'\bconfidential|non[- ]disclosure|nda\b', re.I),
-            "Termination": re.compile(r'\bterminate|termination\b', re.I),
-            "Payment": re.compile(r'\bpayment|invoice|fee\b', re.I),
-            "Governing Law": re.compile(r'\blaw|jurisdiction\b', re.I),
-            "Indemnity": re.compile(r'\bindemnif(y|ication)|liability\b', re.I),
-        }
+# Optional enrichment steps; callers may request any subset
+ALL_STAGES = frozenset({"classify", "summarize", "validate"})
+CLASSIFIER_MODEL = "roberta-large-mnli"
+SUMMARIZER_MODEL = "sshleifer/distilbart-cnn-12-6"
 
-        self.classifier = pipeline("text-classification", model="roberta-large-mnli", truncation=True)
 
-        summarizer_pipe = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6", max_length=100)
+class ClauseProcessor:
+    def __init__(self, metadata_extractor=None, classifier_mode=CLAUSE_CLASSIFIER_MODE,
+                 validation_mode=CLAUSE_VALIDATION_MODE, dedup=CLAUSE_DEDUP):
+        self.rules = get_rule_set("clause_processor")
+
+        # "mnli": roberta-large-mnli labels; "centroid": embedding nearest-centroid clause types
+        self.classifier_mode = classifier_mode
+        if classifier_mode == "centroid":
+            self.centroid_classifier = build_centroid_classifier(min_score=CLAUSE_CENTROID_MIN_SCORE)
+        elif classifier_mode == "mnli":
+            self.classifier = load_pipeline("text-classification", model=CLASSIFIER_MODEL, truncation=True)
+        else:
+            raise ValueError(f"Unknown classifier_mode: {classifier_mode}")
+
+        summarizer_pipe = load_pipeline("summarization", model=SUMMARIZER_MODEL, max_length=100)
         self.llm = HuggingFacePipeline(pipeline=summarizer_pipe)
         self.summarizer = summarizer_pipe
+        self.summary_mode = SUMMARY_MODE
+        self._summary_cache = OrderedDict()
+        self._summary_lock = threading.Lock()
 
         self.summary_prompt = PromptTemplate(
             input_variables=["text"],
@@ -127,52 +248,189 @@ Respond with:
 - Reason (1-2 lines)
 """
         )
-        self.validation_chain = LLMChain(llm=self.llm, prompt=self.validation_prompt)
+        # Built on first use; only the "llm" validation mode needs it
+        self._validation_chain = None
+        self.validation_mode = validation_mode
+        self.risk_rules = get_rule_set("validation_risk")
 
         self.metadata_extractor = metadata_extractor
+        # Near-duplicates of clauses enriched before reuse their results
+        self.deduplicator = ClauseDeduplicator() if dedup else None
+
+    def enrichment_config(self):
+        """What produces each stage's output; cached enrichment is only reused under the same config."""
+        if self.classifier_mode == "centroid":
+            classifier = ["centroid", EMBEDDING_MODEL, CLAUSE_CENTROID_MIN_SCORE]
+        else:
+            classifier = ["mnli", CLASSIFIER_MODEL]
+        return {
+            "classify": classifier,
+            "summarize": [self.summary_mode, SUMMARIZER_MODEL, SUMMARY_MAX_INPUT_TOKENS],
+            "validate": [self.validation_mode, SUMMARIZER_MODEL if self.validation_mode == "llm" else "validation_risk"],
+        }
 
     def rule_based_classify(self, text):
-        for label, pattern in self.rule_patterns.items():
-            if pattern.search(text):
-                return label
-        return "Uncategorized"
+        return self.rules.classify(text)
 
     def transformer_classify(self, text):
+        if self.classifier_mode == "centroid":
+            return self.centroid_classifier.classify(text)
         return self.classifier(text[:512])[0]["label"]
-    
-
-    def summarize_clause(self, text):
-        try:
-            word_count = len(text.split())
-            # Don't summarize short clauses
-            if len(text) < 100 or word_count < 25:
-                return text.strip()
 
-            # Dynamically adjust max_length based on input
-            max_len = min(40, int(word_count * 0.6))  # ~60% of input
-            max_len = max(20, max_len)  # Ensure it's not too small
-
-            return self.summarizer(text[:512], max_length=max_len, min_length=20, do_sample=False)[0]["summary_text"]
-
-        except Exception as e:
-            print(f"Summarization failed: {e}")
-            return "Summary not available"
-
-    def validate_clause(self, text):
-        return self.validation_chain.run(clause_text=text)
-
-    def enrich_clause(self, clause_dict, metadata=None):
+    def transformer_classify_batch(self, texts):
+        """Classify a whole window at once; centroid mode is one embed call and one matmul."""
+        if self.classifier_mode == "centroid":
+            return [label for label, _ in self.centroid_classifier.classify_batch(texts)]
+        return [self.transformer_classify(text) for text in texts]
+
+
+    # ─────────────── summaries ───────────────
+    SENTENCE_PATTERN = re.compile(r"(.+?[.!?])(?:\s|$)", re.S)
+
+    @staticmethod
+    def _is_short(text):
+        # Don't summarize short clauses
+        return len(text) < 100 or len(text.split()) < 25
+
+    @staticmethod
+    def _summary_max_length(text):
+        # ~60% of the input, kept between 20 and 40 tokens
+        return max(20, min(40, int(len(text.split()) * 0.6)))
+
+    def extractive_summary(self, text):
+        """First sentence of the clause; no model call."""
+        text = " ".join(text.split())
+        match = self.SENTENCE_PATTERN.match(text)
+        return match.group(1) if match else " ".join(text.split()[:40])
+
+    def _cache_get(self, key):
+        with self._summary_lock:
+            if key in self._summary_cache:
+                self._summary_cache.move_to_end(key)
+                return self._summary_cache[key]
+        return None
+
+    def _cache_put(self, key, summary):
+        with self._summary_lock:
+            self._summary_cache[key] = summary
+            self._summary_cache.move_to_end(key)
+            while len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+                self._summary_cache.popitem(last=False)
+
+    def _generate_summaries(self, texts):
+        """
+        Abstractive summaries for clauses that need the model. Texts are
+        tokenized once (truncated to SUMMARY_MAX_INPUT_TOKENS), grouped by
+        their target max_length, sorted by token length inside each group
+        so padding stays small, and run through batched generate().
+        """
+        tokenizer, model = self.summarizer.tokenizer, self.summarizer.model
+        encoded = tokenizer(texts, truncation=True, max_length=SUMMARY_MAX_INPUT_TOKENS)["input_ids"]
+
+        buckets = {}
+        for i, text in enumerate(texts):
+            buckets.setdefault(self._summary_max_length(text), []).append(i)
+
+        results = [None] * len(texts)
+        for max_len, indices in buckets.items():
+            indices.sort(key=lambda i: len(encoded[i]))
+            for start in range(0, len(indices), SUMMARY_BATCH_SIZE):
+                batch_ids = indices[start:start + SUMMARY_BATCH_SIZE]
+                try:
+                    batch = tokenizer.pad({"input_ids": [encoded[i] for i in batch_ids]}, return_tensors="pt")
+                    with torch.no_grad():
+                        output = model.generate(**batch, max_length=max_len, min_length=20, do_sample=False)
+                    summaries = tokenizer.batch_decode(output, skip_special_tokens=True)
+                except Exception as e:
+                    print(f"Summarization failed: {e}")
+                    summaries = ["Summary not available"] * len(batch_ids)
+                for i, summary in zip(batch_ids, summaries):
+                    results[i] = summary.strip()
+        return results
+
+    def summarize_batch(self, texts, mode=None):
+        """
+        Summaries for a list of clauses. mode "extractive" returns the first
+        sentence instead of running the model; results for texts seen before
+        come from an LRU cache.
+        """
+        mode = mode or self.summary_mode
+        summaries = [None] * len(texts)
+        pending = {}  # cache key -> indices of texts waiting on the model
+        for i, text in enumerate(texts):
+            if self._is_short(text):
+                summaries[i] = text.strip()
+                continue
+            if mode == "extractive":
+                summaries[i] = self.extractive_summary(text)
+                continue
+            key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            cached = self._cache_get(key)
+            if cached is not None:
+                summaries[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            generated = self._generate_summaries([texts[indices[0]] for indices in pending.values()])
+            for (key, indices), summary in zip(pending.items(), generated):
+                for i in indices:
+                    summaries[i] = summary
+                if summary != "Summary not available":
+                    self._cache_put(key, summary)
+        return summaries
+
+    def summarize_clause(self, text, mode=None):
+        return self.summarize_batch([text], mode=mode)[0]
+
+    # ─────────────── validation ───────────────
+    SEVERITY_ORDER = {"Low": 0, "Medium": 1, "High": 2}
+
+    @property
+    def validation_chain(self):
+        if self._validation_chain is None:
+            self._validation_chain = LLMChain(llm=self.llm, prompt=self.validation_prompt)
+        return self._validation_chain
+
+    def rule_validate_clause(self, text):
+        """Validation from the risk-signal rule set, in the same three-line shape the LLM prompt asks for."""
+        flagged = self.risk_rules.match_all(text)
+        if not flagged:
+            return "Validation Status: Compliant\nRisk Level: Low\nReason: No risk signals found by rule check."
+        severities = [self.risk_rules.attributes.get(label, {}).get("severity", "Medium") for label in flagged]
+        risk = max(severities, key=lambda s: self.SEVERITY_ORDER.get(s, 1))
+        status = "Compliant" if risk == "Low" else "Needs Revision"
+        return f"Validation Status: {status}\nRisk Level: {risk}\nReason: Flagged {', '.join(flagged)}."
+
+    def validate_clause(self, text, mode=None):
+        if (mode or self.validation_mode) == "llm":
+            return self.validation_chain.run(clause_text=text)
+        return self.rule_validate_clause(text)
+
+    def enrich_clause(self, clause_dict, metadata=None, transformer_type=None, summary=None, validation=None, stages=None):
+        """
+        `stages` selects the optional steps (subset of ALL_STAGES, default all);
+        fields of skipped stages are None. rule_based_type is always filled.
+        transformer_type / summary / validation, when given, are used as-is.
+        """
         text = clause_dict["text"]
+        stages = ALL_STAGES if stages is None else set(stages)
+        if transformer_type is None and "classify" in stages:
+            transformer_type = self.transformer_classify(text)
+        if summary is None and "summarize" in stages:
+            summary = self.summarize_clause(text)
         enriched = {
             "clause_id": clause_dict.get("clause_id"),
             "title": clause_dict.get("title"),
             "text": text.strip(),
             "source_file": clause_dict.get("source_file"),
             "section_path": clause_dict.get("section_path"),
+            "start": clause_dict.get("start"),
+            "end": clause_dict.get("end"),
             "rule_based_type": self.rule_based_classify(text),
-            "transformer_type": self.transformer_classify(text),
-            "summary": self.summarize_clause(text),
-            "validation": self.validate_clause(text),
+            "transformer_type": transformer_type,
+            "summary": summary,
+            "validation": validation if validation is not None or "validate" not in stages else self.validate_clause(text),
             "trace": {
                 "trace_id": str(uuid.uuid4()),
                 "timestamp": datetime.datetime.utcnow().isoformat() + "Z"
@@ -193,14 +451,153 @@ Respond with:
 
         return enriched
 
+    def enrich_clauses(self, clauses, metadata=None, stages=None, report=None):
+        """
+        Enrich a window of clauses; the unit of work the streaming pipeline
+        hands over. With deduplication on, near-duplicates of known clauses
+        reuse their canonical's results and `report` (a DedupReport)
+        accumulates the batch's counts.
+        """
+        stages = ALL_STAGES if stages is None else set(stages)
+        if self.deduplicator is not None:
+            return self.deduplicator.enrich(self, clauses, metadata=metadata, stages=stages, report=report)
+        return self.enrich_batch(clauses, metadata=metadata, stages=stages)
+
+    def enrich_batch(self, clauses, metadata=None, stages=None):
+        """Run every requested stage on every clause (batched where the models allow)."""
+        clauses = list(clauses)
+        stages = ALL_STAGES if stages is None else set(stages)
+        texts = [clause["text"] for clause in clauses]
+        types = self.transformer_classify_batch(texts) if "classify" in stages else [None] * len(texts)
+        summaries = self.summarize_batch(texts) if "summarize" in stages else [None] * len(texts)
+        return [
+            self.enrich_clause(clause, metadata=metadata, transformer_type=transformer_type, summary=summary, stages=stages)
+            for clause, transformer_type, summary in zip(clauses, types, summaries)
+        ]
+
     def process_document_with_metadata(self, full_text, clauses, source_file=None):
-        metadata = self.metadata_extractor.extract_metadata(full_text) if self.metadata_extractor else {}
-        enriched_clauses = []
+        """full_text is the document's TextProcessor.preprocess_text output."""
+        metadata = extract_or_load(self.metadata_extractor, full_text, source_file=source_file) if self.metadata_extractor else {}
         for clause in clauses:
             clause["source_file"] = source_file
-            enriched = self.enrich_clause(clause, metadata=metadata)
-            enriched_clauses.append(enriched)
-        return enriched_clauses
+        return self.enrich_clauses(clauses, metadata=metadata)
+
+
+# === Streaming pipeline ===
+# Bytes read at a time when a partial output is checked for resuming
+RESUME_BLOCK = 1 << 20
+
+
+class ClausePipeline:
+    """
+    OCR text -> preprocess -> segment -> enrich -> JSONL, wired as generators.
+
+    Only one document's text and at most `window` clauses are in flight at a
+    time; each enriched clause is written as one JSON line as soon as it is
+    ready. Output goes to `<output>.part` and is renamed into place when the
+    document is finished, so a crashed run resumes from the last clause
+    written to the .part file.
+    """
+
+    def __init__(self, textpreprocessor, segmenter, processor, window=8, stages=None):
+        self.textpreprocessor = textpreprocessor
+        self.segmenter = segmenter
+        self.processor = processor
+        self.window = max(1, window)
+        self.stages = stages
+        self.dedup_report = DedupReport()
+
+    # ─────────────── stages ───────────────
+    def preprocess(self, text):
+        return self.textpreprocessor.preprocess_text(text)
+
+    def segment(self, cleaned_text, source_file=None):
+        return self.segmenter.iter_clauses(cleaned_text, source_file=source_file)
+
+    def enrich(self, clauses, metadata=None, report=None):
+        clauses = iter(clauses)
+        while True:
+            window = list(itertools.islice(clauses, self.window))
+            if not window:
+                return
+            yield from self.processor.enrich_clauses(window, metadata=metadata, stages=self.stages, report=report)
+
+    @staticmethod
+    def write(enriched, handle):
+        count = 0
+        for clause in enriched:
+            handle.write(json.dumps(clause, ensure_ascii=False) + "\n")
+            handle.flush()
+            count += 1
+        return count
+
+    # ─────────────── resume helpers ───────────────
+    @staticmethod
+    def _resume_point(part_path):
+        """Count complete lines in a partial output, dropping a torn last line."""
+        if not os.path.exists(part_path):
+            return 0
+        with open(part_path, "rb+") as f:
+            # Back from the end to the last newline, a block at a time
+            complete = f.seek(0, os.SEEK_END)
+            while complete > 0:
+                start = max(0, complete - RESUME_BLOCK)
+                f.seek(start)
+                block = f.read(complete - start)
+                newline = block.rfind(b"\n")
+                if newline != -1:
+                    complete = start + newline + 1
+                    break
+                complete = start
+            f.truncate(complete)
+
+            f.seek(0)
+            lines = 0
+            while f.tell() < complete:
+                lines += f.read(min(RESUME_BLOCK, complete - f.tell())).count(b"\n")
+        return lines
+
+    def run_file(self, input_path, output_path):
+        """
+        Process one OCR text file into `output_path` (JSONL). Returns the number
+        of clauses written in this run, or None when the output already exists.
+        """
+        if os.path.exists(output_path):
+            return None
+        part_path = output_path + ".part"
+        done = self._resume_point(part_path)
+
+        with open(input_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        source_file = os.path.basename(input_path)
+
+        cleaned = self.preprocess(text)
+        del text
+        extractor = self.processor.metadata_extractor
+        metadata = extract_or_load(extractor, cleaned, source_file=source_file) if extractor else {}
+
+        clauses = itertools.islice(self.segment(cleaned, source_file=source_file), done, None)
+        # Dedup counts for this file, read by run_folder / the corpus processor
+        self.dedup_report = DedupReport()
+        with open(part_path, "a", encoding="utf-8") as out:
+            written = self.write(self.enrich(clauses, metadata=metadata, report=self.dedup_report), out)
+        os.replace(part_path, output_path)
+        return written
+
+    def run_folder(self, input_folder, output_folder, suffix=".txt"):
+        os.makedirs(output_folder, exist_ok=True)
+        for filename in sorted(os.listdir(input_folder)):
+            if not filename.endswith(suffix):
+                continue
+            output_path = os.path.join(output_folder, filename[:-len(suffix)] + "_enriched.jsonl")
+            print(f"Processing file: {filename}")
+            written = self.run_file(os.path.join(input_folder, filename), output_path)
+            if written is None:
+                print(f"Skipped, already processed: {output_path}")
+            else:
+                print(f"Saved {written} enriched clauses to {output_path}")
+                if self.processor.deduplicator is not None:
+                    print(f"Dedup: {self.dedup_report.as_dict()}")
 
 
 # === Main Usage Example ===
@@ -217,19 +614,5 @@ if __name__ == "__main__":
     extractor = ContractMetadataExtractor()
     processor = ClauseProcessor(metadata_extractor=extractor)
 
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".txt"):
-            filepath = os.path.join(input_folder, filename)
-            with open(filepath, "r", encoding="utf-8") as f:
-                text = f.read()
-
-            print(f"Processing file: {filename}")
-
-            cleaned_text = textpreprocessor.preprocess_text(text) # Call the TextProcessor
-            clauses = segmenter.segment_clauses(cleaned_text, source_file=filename) # Use cleaned_text here
-            enriched_clauses = processor.process_document_with_metadata(cleaned_text, clauses, source_file=filename)
-
-            output_path = os.path.join(output_folder, filename.replace(".txt", "_enriched.json"))
-            with open(output_path, "w", encoding="utf-8") as out:
-                json.dump(enriched_clauses, out, indent=2)
-                print(f"Saved enriched output to {output_path}")
\ No newline at end of file
+    pipeline_runner = ClausePipeline(textpreprocessor, segmenter, processor)
+    pipeline_runner.run_folder(input_folder, output_folder)
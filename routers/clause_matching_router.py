@@ -1,9 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List, Dict, Any
-import datetime, uuid
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException, Query, Body
+from typing import List, Dict, Any, Literal, Optional
+import datetime, threading, uuid
 
-from routers.clause_matching import TextProcessor, ClauseSegmenter, ClauseProcessor
+from routers.clause_matching import TextProcessor, ClauseSegmenter, ClauseProcessor, ALL_STAGES
+from routers.clause_dedup import DedupReport
 from routers.metadata_extraction import ContractMetadataExtractor
+from routers.metadata_index import extract_or_load
+from routers.inference_runtime import run_in_pool
+from routers.clause_index import ClauseIndex
+from routers.onnx_backend import shared_embeddings
+from config import EMBEDDING_MODEL
 
 router = APIRouter()
 
@@ -13,7 +19,27 @@ segmenter = ClauseSegmenter()
 metadata_extractor = ContractMetadataExtractor()
 processor = ClauseProcessor(metadata_extractor=metadata_extractor)
 
+_clause_index = None
+_clause_index_lock = threading.Lock()
+
+
 # ---------- helpers ----------
+def get_clause_index() -> ClauseIndex:
+    """The portfolio clause index; it shares the EMBEDDING_MODEL embedder with ClauseValidation."""
+    global _clause_index
+    with _clause_index_lock:
+        if _clause_index is None:
+            _clause_index = ClauseIndex(shared_embeddings(EMBEDDING_MODEL))
+        return _clause_index
+
+
+async def _index_clauses(clauses: List[Dict[str, Any]]) -> None:
+    # Runs after the response is sent; already-indexed clauses are skipped
+    index = get_clause_index()
+    if await run_in_pool("clause_matching", index.add, clauses):
+        index.train_in_background()
+
+
 def _enrich_output(base: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Ensure the response dict includes all expected fields in consistent order.
@@ -24,6 +50,9 @@ def _enrich_output(base: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dic
         "text":             base.get("text", "").strip(),
         "source_file":      base.get("source_file"),
         "section_path":     base.get("section_path"),
+        # Character offsets in the preprocessed contract text
+        "start":            base.get("start"),
+        "end":              base.get("end"),
         "rule_based_type":  base.get("rule_based_type"),
         "transformer_type": base.get("transformer_type"),
         "summary":          base.get("summary"),
@@ -45,9 +74,17 @@ def _enrich_output(base: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dic
 
     return enriched
 
+Stage = Literal["classify", "summarize", "validate"]
+STAGES_DESCRIPTION = "Optional steps to run (repeat the parameter); default all. Skipped steps return null."
+
+
 # ---------- routes ----------
 @router.post("/clause/match", summary="Upload a .txt contract and get enriched clauses")
-async def process_contract(file: UploadFile = File(...)) -> Dict[str, List[Dict[str, Any]]]:
+async def process_contract(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    stages: Optional[List[Stage]] = Query(None, description=STAGES_DESCRIPTION),
+) -> Dict[str, Any]:
     if not file.filename.endswith(".txt"):
         raise HTTPException(status_code=400, detail="Only .txt files are supported")
 
@@ -59,39 +96,69 @@ async def process_contract(file: UploadFile = File(...)) -> Dict[str, List[Dict[
     cleaned = textpreprocessor.preprocess_text(text)
     raw_clauses = segmenter.segment_clauses(cleaned, source_file=file.filename)
 
-    # Extract metadata
-    metadata = metadata_extractor.extract_metadata(cleaned)
+    # Extract metadata (answered from contract_metadata for a document seen before)
+    metadata = await run_in_pool("metadata", extract_or_load, metadata_extractor, cleaned, source_file=file.filename)
 
     # Enrich clauses
-    enriched_clauses = []
-    for clause in raw_clauses:
-        enriched = processor.enrich_clause(clause_dict=clause, metadata=metadata)
-        enriched_clauses.append(_enrich_output(enriched, metadata=metadata))
+    report = DedupReport()
+    enriched = await run_in_pool(
+        "clause_matching", processor.enrich_clauses, raw_clauses, metadata=metadata, stages=stages, report=report
+    )
+    enriched_clauses = [_enrich_output(e, metadata=metadata) for e in enriched]
 
-    return {"clauses": enriched_clauses}
+    # Make the new clauses findable by /clause/similar, off the request
+    background_tasks.add_task(_index_clauses, enriched_clauses)
+
+    response = {"clauses": enriched_clauses}
+    if processor.deduplicator is not None:
+        response["dedup"] = report.as_dict()
+    return response
+
+
+@router.post("/clause/similar", summary="Most similar clauses across all indexed contracts")
+async def similar_clauses(
+    clause_text: str = Body(..., embed=True),
+    k: int = Query(10, ge=1, le=100),
+    exact: Optional[bool] = Query(None, description="Force exact (true) or clustered (false) search; default by index size"),
+) -> Dict[str, Any]:
+    if not clause_text.strip():
+        raise HTTPException(status_code=400, detail="clause_text is empty")
+    index = get_clause_index()
+    matches = await run_in_pool("clause_matching", index.search, clause_text, k=k, exact=exact)
+    return {"indexed_clauses": len(index), "matches": matches}
 
 
 @router.post("/clause/classify", summary="Classify, summarise & validate a single clause")
-async def classify_clause(clause_text: str) -> Dict[str, Any]:
+async def classify_clause(
+    clause_text: str,
+    summary_mode: Optional[Literal["abstractive", "extractive"]] = Query(
+        None, description="extractive = first sentence, no model call; default from SUMMARY_MODE"
+    ),
+    stages: Optional[List[Stage]] = Query(None, description=STAGES_DESCRIPTION),
+) -> Dict[str, Any]:
     """
     Return the full enriched-clause schema (same fields as /clause/match) for a single clause.
     No metadata is included since only a clause is provided.
     """
-    base_dict = {
+    base_dict = await run_in_pool("clause_matching", _classify_single, clause_text, summary_mode, stages)
+    return _enrich_output(base_dict, metadata=None)
+
+
+def _classify_single(clause_text: str, summary_mode: Optional[str] = None, stages: Optional[List[str]] = None) -> Dict[str, Any]:
+    stages = set(stages) if stages is not None else ALL_STAGES
+    return {
         "clause_id":        "N/A",
         "title":            "Provided Clause",
         "text":             clause_text.strip(),
         "source_file":      None,
         "section_path":     None,
         "rule_based_type":  processor.rule_based_classify(clause_text),
-        "transformer_type": processor.transformer_classify(clause_text),
-        "summary":          processor.summarize_clause(clause_text),
-        "validation":       processor.validate_clause(clause_text),
+        "transformer_type": processor.transformer_classify(clause_text) if "classify" in stages else None,
+        "summary":          processor.summarize_clause(clause_text, mode=summary_mode) if "summarize" in stages else None,
+        "validation":       processor.validate_clause(clause_text) if "validate" in stages else None,
         "trace": {
             "trace_id": str(uuid.uuid4()),
             "timestamp": datetime.datetime.utcnow().isoformat() + "Z"
         },
         "status":   "processed",
-    }
-
-    return _enrich_output(base_dict, metadata=None)
\ No newline at end of file
+    }
\ No newline at end of file
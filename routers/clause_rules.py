@@ -0,0 +1,114 @@
+import functools
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import CLAUSE_RULES_FILE
+
+
+# ──────────────────────────────────────────────────────────────────
+# Clause-type rule engine
+#
+# A rule set is an ordered list of (label, regex). All rules are
+# folded into one alternation of named groups so a clause is scanned
+# once instead of once per rule. A single scan can hide matches,
+# though: the alternation keeps only the first rule that matches at
+# a position, and finditer skips positions inside a consumed match.
+# Those positions are re-checked per rule, which keeps the results
+# identical to running each rule's search() on its own.
+#
+# Python's re has no multi-pattern prefilter, so when every rule of
+# a set lists the characters its matches can start with ("first_chars"
+# in the rule file), the combined regex is guarded by a lookahead on
+# them; positions that cannot start any rule fail on one class test
+# instead of walking every alternative. first_chars must cover every
+# possible first character (compiled with the set's flags, so "t"
+# also covers "T" under IGNORECASE); a rule without it turns the
+# guard off for its whole set.
+# ──────────────────────────────────────────────────────────────────
+
+def _start_guard(first_chars: Sequence[Optional[str]]) -> str:
+    """Lookahead on every rule's first_chars; "" unless every rule gives them."""
+    if not first_chars or not all(first_chars):
+        return ""
+    chars = sorted(set("".join(first_chars)))
+    return "(?=[" + "".join(re.escape(c) for c in chars) + "])"
+
+
+class ClauseRuleSet:
+    def __init__(self, rules: Iterable[Tuple[str, str]], flags: int = re.I, default: str = "Uncategorized",
+                 attributes: Optional[Dict[str, dict]] = None, first_chars: Optional[Sequence[Optional[str]]] = None):
+        rules = list(rules)
+        self.labels: List[str] = [label for label, _ in rules]
+        # Extra per-rule fields from the rule file (e.g. severity), by label
+        self.attributes: Dict[str, dict] = attributes or {}
+        self.patterns = [re.compile(pattern, flags) for _, pattern in rules]
+        for compiled in self.patterns:
+            # An inline global flag would leak into every other rule of the combined regex
+            if compiled.flags & ~(flags | re.UNICODE):
+                raise ValueError(f"Rule pattern {compiled.pattern!r} sets global flags; use scoped (?i:...) flags instead")
+        self.default = default
+        alternatives = "|".join(f"(?P<r{i}>{pattern})" for i, (_, pattern) in enumerate(rules))
+        guard = _start_guard(first_chars or [])
+        self.combined = re.compile(f"{guard}(?:{alternatives})", flags)
+
+    def _scan(self, text: str, first_only: bool) -> List[int]:
+        found = [False] * len(self.patterns)
+        best = len(self.patterns)
+        for m in self.combined.finditer(text):
+            hit = int(m.lastgroup[1:])
+            found[hit] = True
+            best = min(best, hit)
+            start, end = m.span()
+            # Rules the alternation or finditer never tried inside this span
+            for i, pattern in enumerate(self.patterns):
+                if found[i] or (first_only and i >= best):
+                    continue
+                for pos in range(start, max(end, start + 1)):
+                    if pattern.match(text, pos):
+                        found[i] = True
+                        best = min(best, i)
+                        break
+            if first_only and best == 0:
+                break
+        return [i for i, hit in enumerate(found) if hit]
+
+    def classify(self, text: str) -> str:
+        """First label, in rule order, whose pattern occurs in text."""
+        hits = self._scan(text, first_only=True)
+        return self.labels[hits[0]] if hits else self.default
+
+    def match_all(self, text: str) -> List[str]:
+        """Every label whose pattern occurs in text, in rule order."""
+        return [self.labels[i] for i in self._scan(text, first_only=False)]
+
+
+# ---------- loading ----------
+@functools.lru_cache(maxsize=None)
+def load_rule_sets(path: Optional[str] = None) -> Dict[str, ClauseRuleSet]:
+    """
+    Read rule sets from a JSON file of the form
+    {"<name>": [{"label": "...", "pattern": "...", ...}, ...], ...}.
+    An optional "first_chars" string enables the start guard (see above);
+    other keys are kept in ClauseRuleSet.attributes.
+    """
+    with open(path or CLAUSE_RULES_FILE, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {
+        name: ClauseRuleSet(
+            ((rule["label"], rule["pattern"]) for rule in rules),
+            attributes={
+                rule["label"]: {k: v for k, v in rule.items() if k not in ("label", "pattern", "first_chars")}
+                for rule in rules
+            },
+            first_chars=[rule.get("first_chars") for rule in rules],
+        )
+        for name, rules in raw.items()
+    }
+
+
+def get_rule_set(name: str, path: Optional[str] = None) -> ClauseRuleSet:
+    rule_sets = load_rule_sets(str(path) if path else None)
+    if name not in rule_sets:
+        raise KeyError(f"Rule set '{name}' not found in {path or CLAUSE_RULES_FILE}")
+    return rule_sets[name]
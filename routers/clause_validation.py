@@ -1,15 +1,24 @@
-import os, json, uuid, datetime, re
-from typing import List, Dict, Tuple
+import os, json, uuid, datetime
+from typing import List, Dict, Sequence, Tuple
 from pathlib import Path
 
-from transformers import pipeline, AutoTokenizer
-from langchain_community.document_loaders import TextLoader
+import numpy as np
+
+from transformers import AutoTokenizer
 from langchain_text_splitters import TokenTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.vectorstores import Chroma
 from langchain_huggingface import HuggingFacePipeline
 from langchain.chains import RetrievalQA
+from langchain.chains.question_answering import load_qa_chain
 from langchain_core.runnables import RunnableSequence
+from langchain_core.documents import Document
+from langchain_core.prompts import format_document
+from routers.clause_rules import get_rule_set
+from routers.onnx_backend import load_pipeline, shared_embeddings, embeddings_backend
+from routers.retrieval_cache import RetrievalCache, clause_fingerprint, index_hash
+from routers.regulation_index import RegulationIndex
+from routers.regulation_corpus import RegulationCorpus
+from config import EMBEDDING_MODEL, REGULATION_RETRIEVAL, REGULATION_PASSAGE_WORDS, REGULATION_FUSION_DEPTH
 import logging
 logging.getLogger("langchain").setLevel(logging.ERROR)
 
@@ -26,90 +35,260 @@ MAX_TOKENS_QA = 512  # truncate for QA confidence
 
 
 class ClauseValidation:
-    def __init__(self, clause_folder: str, regulation_path:str, output_folder: str):
+    def __init__(self, clause_folder: str, regulation_path:str, output_folder: str,
+                 retrieval: str = REGULATION_RETRIEVAL):
         self.clause_folder = clause_folder
         self.regulation_path = regulation_path
         self.output_folder = output_folder
+        self.retrieval = retrieval
         os.makedirs(output_folder, exist_ok=True)
 
         # 1) Text-generation LLM (Flan-T5) for RetrievalQA & risk prompts
-        gen_pipe = pipeline("text2text-generation",
-                            model="google/flan-t5-base",
-                            max_length=256, device=-1)
+        gen_pipe = load_pipeline("text2text-generation",
+                                 model="google/flan-t5-base",
+                                 max_length=256, device=-1)
         self.llm = HuggingFacePipeline(pipeline=gen_pipe)
 
-        # 2) Confidence QA pipeline + tokenizer
-        self.qa_conf_pipe = pipeline("question-answering",
-                                     model="deepset/roberta-base-squad2",
-                                     device=-1)
-        self.qa_tokenizer = AutoTokenizer.from_pretrained("deepset/roberta-base-squad2")
-
-        # 3) Build semantic retriever over FAR/DFARS
-        loader = TextLoader(self.regulation_path, encoding="utf-8")
-        docs = loader.load()
-
-        splitter = TokenTextSplitter(
-                    chunk_size=500,
-                    chunk_overlap=50)
-        doc_chunks = splitter.split_documents(docs)
-
-        embedder = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        # chroma_dir = os.path.join(self.output_folder, "chroma_db")
-        vectorstore = Chroma.from_documents(doc_chunks, embedder)
-        retriever = vectorstore.as_retriever(search_type="similarity", k=3)
-
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            retriever=retriever,
-            chain_type="stuff"
-        )
+        # The same instance the clause similarity index embeds with
+        self.embedder = shared_embeddings(EMBEDDING_MODEL)
+        # regulation_path is a file or a folder of .txt sources, deduplicated into one corpus
+        self.corpus = RegulationCorpus(self.regulation_path)
+
+        # Chunk embeddings / documents for the batched path; filled on first use
+        self._chunk_matrix = None
+        self._chunk_docs = None
+        self._chunk_positions = None
+
+        if self.retrieval == "hybrid":
+            # 2) Section-aware passages, BM25 + dense; citations and confidence
+            #    come from the retrieval itself, no QA model
+            passages = self.corpus.passages(REGULATION_PASSAGE_WORDS)
+            self.regulation_version = self.corpus.version(
+                self.retrieval, REGULATION_PASSAGE_WORDS, EMBEDDING_MODEL, embeddings_backend(EMBEDDING_MODEL)
+            )
+            self.regulation_index = RegulationIndex.from_passages(passages, self.embedder, self.regulation_version)
+            self.k = 4
+            self.combine_chain = load_qa_chain(self.llm, chain_type="stuff")
+            chunks, retrieval_params = len(passages), (REGULATION_FUSION_DEPTH,)
+        else:
+            self.regulation_index = None
+
+            # 2) Confidence QA pipeline + tokenizer
+            self.qa_conf_pipe = load_pipeline("question-answering",
+                                              model="deepset/roberta-base-squad2",
+                                              device=-1)
+            self.qa_tokenizer = AutoTokenizer.from_pretrained("deepset/roberta-base-squad2")
+
+            # 3) Build semantic retriever over FAR/DFARS
+            docs = [Document(page_content=self.corpus.text, metadata={"source": str(self.regulation_path)})]
+
+            chunk_size, chunk_overlap = 500, 50
+            splitter = TokenTextSplitter(
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap)
+            doc_chunks = splitter.split_documents(docs)
+            self.regulation_version = self.corpus.version(
+                self.retrieval, chunk_size, chunk_overlap, EMBEDDING_MODEL, embeddings_backend(EMBEDDING_MODEL)
+            )
+
+            # chroma_dir = os.path.join(self.output_folder, "chroma_db")
+            # Positional ids are stable across rebuilds of the same text, so cached retrievals stay valid
+            self.vectorstore = Chroma.from_documents(
+                doc_chunks, self.embedder, ids=[f"chunk-{i}" for i in range(len(doc_chunks))]
+            )
+            self.retriever = self.vectorstore.as_retriever(search_type="similarity", k=3)
+            self.k = self.retriever.search_kwargs.get("k", 4)
+
+            self.qa_chain = RetrievalQA.from_chain_type(
+                llm=self.llm,
+                retriever=self.retriever,
+                chain_type="stuff"
+            )
+            self.combine_chain = self.qa_chain.combine_documents_chain
+            chunks, retrieval_params = len(doc_chunks), ()
 
-    # ────────────── Utility: truncate long clause for QA score ─────────────
-    def _truncate_for_qa(self, text: str) -> str:
-        tokens = self.qa_tokenizer.encode(text, truncation=True, max_length=MAX_TOKENS_QA)
-        return self.qa_tokenizer.decode(tokens, skip_special_tokens=True)
+        self.corpus.record(self.regulation_version, self.retrieval, chunks)
+
+        # Retrieval results per clause fingerprint, valid for this exact index
+        self.index_hash = index_hash(
+            self.regulation_version, *retrieval_params, self.k, self._compliance_query(""),
+        )
+        self.retrieval_cache = RetrievalCache(self.index_hash)
 
     # ─────────────── Compliance + confidence per clause ────────────────
     def evaluate_clause(self, clause: str) -> Dict[str, str]:
-        query = (
+        # What qa_chain.invoke does, with the retrieval step served from the cache
+        hits = self._retrieve_scored([clause])[0]
+        answer = self.llm.invoke(self._stuff_prompt(self._compliance_query(clause), [doc for doc, _ in hits]))
+        return self._compliance_results([clause], [answer], [hits])[0]
+
+    # ────────────────────── Risk rating prompt ───────────────────────────
+    @staticmethod
+    def _risk_prompt(clause: str) -> str:
+        return (
+            "Rate the following clause's risk level for a US government contract "
+            "(Low, Medium, or High) and give one-sentence rationale.\n\n"
+            f"Clause:\n{clause}"
+        )
+
+    def detect_risk(self, clause: str) -> Dict[str, str]:
+        risk_answer = self.llm.invoke(self._risk_prompt(clause))
+        return {"risk": risk_answer, "confidence": "N/A"}
+
+    # ─────────────── Batched (document-level) path ───────────────
+    # Same prompts, retrieval and models as evaluate_clause / detect_risk,
+    # but each model runs once per document: one embedding call for every
+    # query, one matrix search against the regulation chunks, one batched
+    # flan-t5 generate for all compliance *and* risk prompts, and (dense
+    # retrieval only) one batched QA pass.
+    @staticmethod
+    def _compliance_query(clause: str) -> str:
+        return (
             "Is the following clause compliant with FAR or DFARS? "
             "Answer Compliant or Non-Compliant and cite the section.\n\n"
             f"Clause: {clause}"
         )
-        answer = self.qa_chain.invoke({"query": query})["result"]
 
-        qa_result = self.qa_conf_pipe({
-            "context": self._truncate_for_qa(clause),
-            "question": "Which FAR or DFARS section is referenced?"
-        })
-        confidence = round(qa_result["score"], 3)
+    def _load_chunk_matrix(self):
+        if self._chunk_matrix is None:
+            stored = self.vectorstore.get(include=["embeddings", "documents", "metadatas"])
+            self._chunk_matrix = np.asarray(stored["embeddings"], dtype=np.float32)
+            self._chunk_docs = [
+                Document(page_content=text, metadata={**(meta or {}), "chunk_id": chunk_id})
+                for chunk_id, text, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+            ]
+            self._chunk_positions = {chunk_id: j for j, chunk_id in enumerate(stored["ids"])}
+        return self._chunk_matrix, self._chunk_docs
+
+    def _load_documents(self) -> List[Document]:
+        if self.regulation_index is None:
+            return self._load_chunk_matrix()[1]
+        if self._chunk_docs is None:
+            self._chunk_docs = [
+                Document(
+                    page_content=RegulationIndex.passage_text(p),
+                    metadata={"chunk_id": p["chunk_id"], "section_id": p["section_id"], "title": p["title"]},
+                )
+                for p in self.regulation_index.passages
+            ]
+            self._chunk_positions = {doc.metadata["chunk_id"]: j for j, doc in enumerate(self._chunk_docs)}
+        return self._chunk_docs
+
+    def _search_batch(self, queries: Sequence[str]) -> List[List[Tuple[int, float]]]:
+        """Top-k (chunk position, score) per query; the score is the query/chunk cosine similarity."""
+        if self.regulation_index is not None:
+            return self.regulation_index.search_batch(queries, k=self.k)
+        matrix, docs = self._load_chunk_matrix()
+        k = min(self.k, len(docs))
+        if not queries or k == 0:
+            return [[] for _ in queries]
+        vectors = np.asarray(self.embedder.embed_documents(list(queries)), dtype=np.float32)
+        dots = vectors @ matrix.T
+        vector_norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        matrix_norms = np.linalg.norm(matrix, axis=1)
+        # Ranked like the Chroma retriever (squared L2)
+        distances = vector_norms ** 2 - 2 * dots + (matrix_norms ** 2)[None, :]
+        cosines = dots / np.maximum(vector_norms * matrix_norms[None, :], 1e-12)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(distances[row, candidates], kind="stable")]
+            results.append([(int(j), round(float(cosines[row, j]), 3)) for j in ranked])
+        return results
+
+    def retrieve_batch(self, queries: Sequence[str]) -> List[List[Document]]:
+        """Top-k regulation chunks (dense) or passages (hybrid) per query."""
+        docs = self._load_documents()
+        return [[docs[j] for j, _ in hits] for hits in self._search_batch(queries)]
+
+    def _retrieve_scored(self, clauses: Sequence[str]) -> List[List[Tuple[Document, float]]]:
+        """(chunk, score) for each clause's compliance query, through the retrieval cache."""
+        docs = self._load_documents()
+        fingerprints = [clause_fingerprint(c) for c in clauses]
+        cached = self.retrieval_cache.get_many(fingerprints)
+
+        todo = {}  # fingerprint -> one clause to retrieve for
+        for fp, clause in zip(fingerprints, clauses):
+            if fp not in cached or any(chunk_id not in self._chunk_positions for chunk_id, _ in cached[fp]):
+                todo.setdefault(fp, clause)
+        if todo:
+            retrieved = self._search_batch([self._compliance_query(c) for c in todo.values()])
+            fresh = {
+                fp: [[docs[j].metadata["chunk_id"], score] for j, score in hits]
+                for fp, hits in zip(todo, retrieved)
+            }
+            self.retrieval_cache.put_many(fresh)
+            cached.update(fresh)
+        return [
+            [(docs[self._chunk_positions[chunk_id]], score) for chunk_id, score in cached[fp]]
+            for fp in fingerprints
+        ]
 
-        return {"answer": answer, "confidence": confidence}
+    def retrieve_for_clauses(self, clauses: Sequence[str]) -> List[List[Document]]:
+        return [[doc for doc, _ in hits] for hits in self._retrieve_scored(clauses)]
 
-    # ────────────────────── Risk rating prompt ───────────────────────────
-    def detect_risk(self, clause: str) -> Dict[str, str]:
-        risk_prompt = (
-            "Rate the following clause's risk level for a US government contract "
-            "(Low, Medium, or High) and give one-sentence rationale.\n\n"
-            f"Clause:\n{clause}"
+    def _stuff_prompt(self, query: str, docs: List[Document]) -> str:
+        """The prompt RetrievalQA's "stuff" chain builds for this query and these chunks."""
+        combine = self.combine_chain
+        context = combine.document_separator.join(format_document(d, combine.document_prompt) for d in docs)
+        return combine.llm_chain.prompt.format(**{combine.document_variable_name: context, "question": query})
+
+    def _confidences(self, clauses: Sequence[str]) -> List[float]:
+        input_ids = self.qa_tokenizer(list(clauses), truncation=True, max_length=MAX_TOKENS_QA)["input_ids"]
+        contexts = self.qa_tokenizer.batch_decode(input_ids, skip_special_tokens=True)
+        results = self.qa_conf_pipe(
+            [{"context": context, "question": "Which FAR or DFARS section is referenced?"} for context in contexts]
         )
-        risk_answer = self.llm.invoke(risk_prompt)
-        return {"risk": risk_answer, "confidence": "N/A"}
+        if isinstance(results, dict):  # a single input comes back unwrapped
+            results = [results]
+        return [round(r["score"], 3) for r in results]
+
+    def _compliance_results(self, clauses, answers, hits) -> List[Dict[str, str]]:
+        if self.regulation_index is None:
+            return [
+                {"answer": answer, "confidence": confidence}
+                for answer, confidence in zip(answers, self._confidences(clauses))
+            ]
+        # Hybrid: cite the sections retrieved for the answer; a section the
+        # clause names itself scores 1.0, otherwise the best passage cosine
+        return [
+            {
+                "answer": answer,
+                "confidence": max((score for _, score in found), default=0.0),
+                "citations": list(dict.fromkeys(doc.metadata["section_id"] for doc, _ in found)),
+            }
+            for answer, found in zip(answers, hits)
+        ]
+
+    def assess_clauses(self, clauses: Sequence[str]) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """(evaluate_clause results, detect_risk results) for every clause, batched per model."""
+        clauses = list(clauses)
+        if not clauses:
+            return [], []
+        hits = self._retrieve_scored(clauses)
+        prompts = [
+            self._stuff_prompt(self._compliance_query(c), [doc for doc, _ in found])
+            for c, found in zip(clauses, hits)
+        ]
+        answers = self.llm.batch(prompts + [self._risk_prompt(c) for c in clauses])
+        compliance = self._compliance_results(clauses, answers[:len(clauses)], hits)
+        risks = [{"risk": answer, "confidence": "N/A"} for answer in answers[len(clauses):]]
+        return compliance, risks
+
+    def evaluate_clauses(self, clauses: Sequence[str]) -> List[Dict[str, str]]:
+        return self.assess_clauses(clauses)[0]
+
+    def detect_risks(self, clauses: Sequence[str]) -> List[Dict[str, str]]:
+        clauses = list(clauses)
+        if not clauses:
+            return []
+        answers = self.llm.batch([self._risk_prompt(c) for c in clauses])
+        return [{"risk": answer, "confidence": "N/A"} for answer in answers]
 
     # ────────────── Simple rule classifier for clause type ───────────────
     @staticmethod
     def _classify_type(text: str) -> str:
-        patterns = {
-            "Termination": r"\bterminate|termination\b",
-            "Payment": r"\bpayment|invoice|fee\b",
-            "Governing Law": r"\bgoverning law|jurisdiction\b",
-            "Confidentiality": r"\bconfidential|non[- ]disclosure\b",
-            "Indemnity": r"\bindemnif(y|ication)|liability\b",
-        }
-        for label, pat in patterns.items():
-            if re.search(pat, text, flags=re.I):
-                return label
-        return "Uncategorized"
+        return get_rule_set("clause_validation").classify(text)
 
     @staticmethod
     def _missing_misaligned(found: List[str], comp_map: Dict[str, str]) -> Tuple[List[str], List[str]]:
@@ -123,11 +302,15 @@ class ClauseValidation:
     # ───────────────── Main batch driver ─────────────────────────
     def process_clauses(self):
         for fname in os.listdir(self.clause_folder):
-            if not fname.endswith(".json"):
+            if not fname.endswith((".json", ".jsonl")):
                 continue
 
+            # .jsonl is the streaming pipeline's output: one clause per line
             with open(os.path.join(self.clause_folder, fname), encoding="utf-8") as f:
-                clauses = json.load(f)
+                if fname.endswith(".jsonl"):
+                    clauses = [json.loads(line) for line in f if line.strip()]
+                else:
+                    clauses = json.load(f)
 
             if not isinstance(clauses, list):
                 print(f" {fname} skipped (not list).")
@@ -136,19 +319,16 @@ class ClauseValidation:
             found_types, comp_map = [], {}
             outputs = []
 
-            for cl in clauses:
-                clause_txt = cl.get("text") or cl.get("clause_text", "")
-                if not clause_txt:
-                    continue
+            clauses = [cl for cl in clauses if cl.get("text") or cl.get("clause_text", "")]
+            texts = [cl.get("text") or cl.get("clause_text", "") for cl in clauses]
+            # One batched retrieval + generation pass for the whole file
+            comps, risks = self.assess_clauses(texts)
 
+            for cl, clause_txt, comp, risk in zip(clauses, texts, comps, risks):
                 ctype = self._classify_type(clause_txt)
                 found_types.append(ctype)
-
-                comp = self.evaluate_clause(clause_txt)
                 comp_map[ctype] = comp["answer"]
 
-                risk = self.detect_risk(clause_txt)
-
                 closeout = (
                     "Passed"
                     if ("compliant" in comp["answer"].lower() and "low" in risk["risk"].lower())
@@ -162,6 +342,7 @@ class ClauseValidation:
                         "clause_text": clause_txt,
                         "compliance_summary": comp["answer"],
                         "compliance_confidence": comp["confidence"],
+                        "compliance_citations": comp.get("citations", []),
                         "risk_assessment": risk["risk"],
                         "risk_confidence": risk["confidence"],
                         "closeout_status": closeout,
@@ -181,7 +362,7 @@ class ClauseValidation:
                 o["misaligned_clauses"] = misaligned
 
             out_path = os.path.join(
-                self.output_folder, fname.replace(".json", "_validated.json")
+                self.output_folder, Path(fname).stem + "_validated.json"
             )
             with open(out_path, "w", encoding="utf-8") as out_f:
                 json.dump(outputs, out_f, indent=2)
@@ -191,7 +372,7 @@ class ClauseValidation:
 if __name__ == "__main__":
     BASE_DIR = Path(__file__).resolve().parent
     clause_folder = BASE_DIR / "clause_output"
-    regulation_path = BASE_DIR / "clause_compliance" / "far_dfars.txt"
+    regulation_path = BASE_DIR / "clause_compliance"
     output_folder = BASE_DIR / "chroma_db"
 
     validator = ClauseValidation(
@@ -4,6 +4,8 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Body
 from fastapi.responses import FileResponse
 
 from routers.clause_validation import ClauseValidation
+from routers.regulation_corpus import list_versions
+from routers.inference_runtime import run_in_pool
 from pathlib import Path
 
 # Explicitly set your project root folder
@@ -11,12 +13,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Now set your paths
 CLAUSE_IN   = BASE_DIR / "clause_output"
-REGS_FILE   = BASE_DIR / "clause_compliance" / "far_dfars.txt"
+REGS_DIR    = BASE_DIR / "clause_compliance"  # every .txt in it, deduplicated
 OUTPUT_DIR  = BASE_DIR / "clause_output"  # reuse input folder
 
 validator = ClauseValidation(
     clause_folder=str(CLAUSE_IN),
-    regulation_path=str(REGS_FILE),
+    regulation_path=str(REGS_DIR),
     output_folder=str(OUTPUT_DIR),
 )
 
@@ -24,13 +26,22 @@ router = APIRouter(prefix="/Clause_Validation", tags=["Clause_Validation"])
 # ───────────────────────────────────────────────
 
 
+def _validate_folder(clause_folder: Path):
+    local_validator = ClauseValidation(
+        clause_folder=str(clause_folder),
+        regulation_path=str(REGS_DIR),
+        output_folder=str(OUTPUT_DIR),
+    )
+    local_validator.process_clauses()
+
+
 @router.post("/validate-batch")
-def validate_batch():
+async def validate_batch():
     """
     Run ClauseValidation.process_clauses() on every JSON file currently
     in `data/clause_output` and return a list of generated filenames.
     """
-    validator.process_clauses()
+    await run_in_pool("clause_validation", validator.process_clauses)
 
     validated_files = sorted(
         p.name for p in OUTPUT_DIR.glob("*_validated.json")
@@ -39,7 +50,7 @@ def validate_batch():
 
 
 @router.post("/validate-single")
-def validate_single(clauses: list[dict] = Body(..., example=[
+async def validate_single(clauses: list[dict] = Body(..., example=[
         {"clause_id": 1, "text": "This Agreement may be terminated by either party…"},
         {"clause_id": 2, "text": "All payments shall be made within thirty (30) days…"}
     ])):
@@ -57,12 +68,7 @@ def validate_single(clauses: list[dict] = Body(..., example=[
     tmp_path.write_text(json.dumps(clauses, indent=2), encoding="utf-8")
 
     # Point the validator at the temp file only
-    local_validator = ClauseValidation(
-        clause_folder=str(tmp_path.parent),
-        regulation_path=str(REGS_FILE),
-        output_folder=str(OUTPUT_DIR),
-    )
-    local_validator.process_clauses()
+    await run_in_pool("clause_validation", _validate_folder, tmp_path.parent)
 
     out_file = tmp_path.with_name(tmp_path.stem + "_validated.json")
     result = json.loads(out_file.read_text(encoding="utf-8"))
@@ -88,16 +94,26 @@ async def validate_upload(file: UploadFile = File(...)):
     dest.write_bytes(await file.read())
 
     # Process just this file
-    local_validator = ClauseValidation(
-        clause_folder=str(CLAUSE_IN),
-        regulation_path=str(REGS_FILE),
-        output_folder=str(OUTPUT_DIR),
-    )
-    local_validator.process_clauses()
+    await run_in_pool("clause_validation", _validate_folder, CLAUSE_IN)
 
     validated_path = dest.with_name(dest.stem + "_validated.json")
     if not validated_path.exists():
         raise HTTPException(500, "Validation failed")
 
     return FileResponse(validated_path, media_type="application/json",
-                        filename=validated_path.name)
\ No newline at end of file
+                        filename=validated_path.name)
+
+@router.get("/retrieval-cache/stats")
+def retrieval_cache_stats():
+    """Hit rate of the FAR/DFARS retrieval cache for the current regulation index."""
+    return validator.retrieval_cache.stats()
+
+@router.delete("/retrieval-cache/stale")
+def purge_retrieval_cache():
+    """Drop cached retrievals of every regulation index but the current one (others expire on their own)."""
+    return {"deleted": validator.retrieval_cache.purge_other_indexes()}
+
+@router.get("/regulations")
+def regulations():
+    """Regulation index versions built so far, with their sources and chunk counts."""
+    return {"loaded": validator.regulation_version, "versions": list_versions()}
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, Optional
+
+from routers.metadata_index import load_metadata, search_metadata
+
+router = APIRouter()
+
+
+@router.get("/contracts", summary="Look up extracted contract metadata without re-running extraction")
+def list_contract_metadata(
+    vendor: Optional[str] = Query(None, description="Vendor name, case-insensitive exact match"),
+    contract_type: Optional[str] = Query(None, description="e.g. Service Agreement, Nda, Purchase Order"),
+    contract_number: Optional[str] = Query(None),
+    ending_within_days: Optional[int] = Query(None, ge=0, description="End date between today and today + N days"),
+    min_value: Optional[float] = Query(None, ge=0),
+    max_value: Optional[float] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+) -> Dict[str, Any]:
+    rows = search_metadata(
+        vendor=vendor,
+        contract_type=contract_type,
+        contract_number=contract_number,
+        ending_within_days=ending_within_days,
+        min_value=min_value,
+        max_value=max_value,
+        limit=limit,
+    )
+    return {"count": len(rows), "contracts": rows}
+
+
+@router.get("/contracts/{doc_hash}", summary="Stored metadata for one document hash")
+def get_contract_metadata(doc_hash: str) -> Dict[str, Any]:
+    metadata = load_metadata(doc_hash)
+    if metadata is None:
+        raise HTTPException(status_code=404, detail="No metadata stored for this document")
+    return {"doc_hash": doc_hash, "metadata": metadata}
@@ -0,0 +1,234 @@
+"""
+Corpus processor: fan the ocr_output -> clause_output batch flow out over a
+process pool.
+
+    python -m routers.corpus_processor clauses  --input ocr_output --output clause_output
+    python -m routers.corpus_processor metadata --input ocr_output --output clause_output
+
+Every worker loads its models once (pool initializer) and then handles whole
+files. The default worker count is bounded by cores and by memory: each
+clauses worker holds roberta-large-mnli, distilbart, BERT-NER and spaCy, so
+it is sized from WORKER_MEMORY_GB of the machine's RAM per worker. Outputs
+are written atomically (temp file + os.replace) and a file is skipped when
+its output is newer than its input, so an interrupted run can simply be
+restarted.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+
+# Resident memory one worker needs once its models are loaded (rough, CPU fp32)
+WORKER_MEMORY_GB = {"clauses": 4.0, "metadata": 1.5}
+
+
+# ---------- per-worker state ----------
+_pipeline = None
+_extractor = None
+_textprocessor = None
+
+
+def _limit_threads(threads):
+    # N workers x all-cores intra-op threads oversubscribes the box.
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _init_worker(mode, threads):
+    global _pipeline, _extractor, _textprocessor
+    _limit_threads(threads)
+
+    from routers.metadata_extraction import ContractMetadataExtractor
+    from routers.clause_matching import TextProcessor
+    _extractor = ContractMetadataExtractor()
+    _textprocessor = TextProcessor()
+
+    if mode == "clauses":
+        from routers.clause_matching import ClauseSegmenter, ClauseProcessor, ClausePipeline
+        processor = ClauseProcessor(metadata_extractor=_extractor)
+        _pipeline = ClausePipeline(_textprocessor, ClauseSegmenter(), processor)
+
+
+# ---------- helpers ----------
+def is_current(input_path, output_path):
+    """True when output_path exists and is at least as new as input_path."""
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def _total_memory_gb():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_workers(mode, memory_gb=None):
+    """One worker per core, but no more than fit in RAM at WORKER_MEMORY_GB each."""
+    workers = os.cpu_count() or 1
+    total = _total_memory_gb()
+    if total is not None:
+        workers = min(workers, int(total // (memory_gb or WORKER_MEMORY_GB[mode])))
+    return max(1, workers)
+
+
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _output_path(mode, output_folder, filename):
+    base_name = os.path.splitext(filename)[0]
+    suffix = "_enriched.jsonl" if mode == "clauses" else "_metadata.json"
+    return os.path.join(output_folder, base_name + suffix)
+
+
+# ---------- tasks (run inside workers) ----------
+def _process_clauses(input_path, output_path):
+    if os.path.exists(output_path):
+        # stale output from an older input; regenerate
+        os.remove(output_path)
+    part_path = output_path + ".part"
+    if os.path.exists(part_path) and not is_current(input_path, part_path):
+        # partial output of an older input: resuming it would keep its clauses
+        os.remove(part_path)
+    written = _pipeline.run_file(input_path, output_path)
+    result = {"clauses": written or 0}
+    if _pipeline.processor.deduplicator is not None:
+        result["dedup"] = _pipeline.dedup_report.as_dict()
+    return result
+
+
+def _process_metadata(input_path, output_path):
+    from routers.metadata_index import extract_or_load
+    with open(input_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    # Same text the clauses run and /clause/match key metadata on
+    cleaned = _textprocessor.preprocess_text(text)
+    metadata = extract_or_load(_extractor, cleaned, source_file=os.path.basename(input_path))
+    write_json_atomic(output_path, metadata)
+    return {"fields": sum(1 for v in metadata.values() if v)}
+
+
+def _run_task(mode, input_path, output_path):
+    started = time.perf_counter()
+    if mode == "clauses":
+        result = _process_clauses(input_path, output_path)
+    else:
+        result = _process_metadata(input_path, output_path)
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    return result
+
+
+# ---------- driver ----------
+def collect_metadata_summary(output_folder, filenames):
+    """Aggregate per-file metadata into metadata_summary.json (same shape as before)."""
+    summary = {}
+    for filename in filenames:
+        path = _output_path("metadata", output_folder, filename)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                summary[os.path.splitext(filename)[0]] = json.load(f)
+    summary_path = os.path.join(output_folder, "metadata_summary.json")
+    write_json_atomic(summary_path, summary)
+    return summary_path
+
+
+def summarize_results(mode, results):
+    """Totals over the files processed in this run (clause and dedup counts for the clauses mode)."""
+    summary = {
+        "files": len(results),
+        "seconds": round(sum(r["seconds"] for r in results.values()), 2),
+    }
+    if mode == "clauses":
+        summary["clauses"] = sum(r["clauses"] for r in results.values())
+        reports = [r["dedup"] for r in results.values() if "dedup" in r]
+        if reports:
+            dedup = {
+                key: sum(report[key] for report in reports)
+                for key in ("clauses", "duplicates", "new_canonicals", "stale")
+            }
+            for key in ("enrich_seconds", "seconds_saved"):
+                dedup[key] = round(sum(report[key] for report in reports), 2)
+            dedup["dedup_ratio"] = round(dedup["duplicates"] / dedup["clauses"], 3) if dedup["clauses"] else 0.0
+            summary["dedup"] = dedup
+    else:
+        summary["fields"] = sum(r["fields"] for r in results.values())
+    return summary
+
+
+def process_corpus(mode, input_folder, output_folder, suffix=".txt", workers=None, force=False, memory_gb=None):
+    os.makedirs(output_folder, exist_ok=True)
+    filenames = sorted(f for f in os.listdir(input_folder) if f.endswith(suffix))
+
+    pending = []
+    for filename in filenames:
+        input_path = os.path.join(input_folder, filename)
+        output_path = _output_path(mode, output_folder, filename)
+        if force or not is_current(input_path, output_path):
+            pending.append((filename, input_path, output_path))
+
+    print(f"{len(filenames)} files, {len(filenames) - len(pending)} up to date, {len(pending)} to process")
+
+    failures, results = {}, {}
+    if pending:
+        workers = max(1, min(workers or default_workers(mode, memory_gb), len(pending)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mode, threads)) as pool:
+            futures = {
+                pool.submit(_run_task, mode, input_path, output_path): filename
+                for filename, input_path, output_path in pending
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), unit="file"):
+                filename = futures[future]
+                try:
+                    results[filename] = result = future.result()
+                except Exception as e:
+                    failures[filename] = str(e)
+                    tqdm.write(f" {filename} failed: {e}")
+                else:
+                    tqdm.write(f" {filename}: {json.dumps(result)}")
+        summary = summarize_results(mode, results)
+        print(f"Run summary: {json.dumps(summary)}")
+        write_json_atomic(os.path.join(output_folder, f"{mode}_run_summary.json"), {"summary": summary, "files": results})
+
+    if mode == "metadata":
+        print(f"Metadata summary saved to: {collect_metadata_summary(output_folder, filenames)}")
+    if failures:
+        print(f"{len(failures)} file(s) failed; rerun to retry them.")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process the OCR corpus across all cores.")
+    parser.add_argument("mode", choices=["clauses", "metadata"])
+    parser.add_argument("--input", default="ocr_output")
+    parser.add_argument("--output", default="clause_output")
+    parser.add_argument("--suffix", default=".txt", help="input file suffix (metadata flow used _ocr.txt)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="default: one per core, capped by --worker-memory-gb of RAM per worker")
+    parser.add_argument("--worker-memory-gb", type=float, default=None,
+                        help="RAM budget per worker (default: 4 for clauses, 1.5 for metadata)")
+    parser.add_argument("--force", action="store_true", help="reprocess files whose outputs are current")
+    args = parser.parse_args(argv)
+
+    failures = process_corpus(args.mode, args.input, args.output, args.suffix, args.workers, args.force,
+                              args.worker_memory_gb)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
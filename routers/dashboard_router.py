@@ -9,12 +9,20 @@ from fastapi import Query, HTTPException
 from typing import Literal
 from datetime import datetime, timedelta
 from config import DB_PATH, CLAUSE_FILE
+from routers.response_cache import cached_response, response_cache
+from routers.pagination import encode_cursor, decode_cursor
 
 router = APIRouter()
 
 DB_PATH = "contracts.db"
 file_location = CLAUSE_FILE 
 
+# Cache TTLs (seconds) for the polled dashboard GETs
+QUICK_STATS_TTL = 60
+RECENT_ACTIVITY_TTL = 15
+AI_RECOMMENDATIONS_TTL = 60
+CONTRACTS_SUMMARY_TTL = 120
+
 # --- Load JSON data and insert into DB ---
 def load_clauses_from_json():
     with open(CLAUSE_FILE) as f:
@@ -162,6 +170,10 @@ class AuditLog(BaseModel):
     details: str
     category: str
 
+class AuditLogPage(BaseModel):
+    logs: List[AuditLog]
+    next_cursor: Optional[str] = None
+
 class UserIn(BaseModel):
     name: str
     email: str
@@ -388,6 +400,7 @@ def seed_sample_activities():
 
     conn.commit()
     conn.close()
+    response_cache.invalidate("contract_activity")
 
     return {
         "message": "Sample activity data inserted successfully",
@@ -399,6 +412,7 @@ def seed_sample_activities():
 # GET Endpoint for clause_activity
 # ------------------------
 @router.get("/api/dashboard/activity/recent", response_model=ActivityFeed)
+@cached_response(ttl=RECENT_ACTIVITY_TTL, tags=["contract_activity"])
 def get_recent_activities(limit: int = Query(10, ge=1)):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -553,6 +567,7 @@ def seed_ai_recommendations():
 
     conn.commit()
     conn.close()
+    response_cache.invalidate("ai_recommendations")
 
     return {"message": "Sample AI recommendations inserted", "inserted": len(sample_data)}
 
@@ -560,6 +575,7 @@ def seed_ai_recommendations():
 # GET Endpoint for AI Recommendations
 # ------------------------------------
 @router.get("/api/dashboard/recommendations/ai", response_model=AIRecommendationResponse)
+@cached_response(ttl=AI_RECOMMENDATIONS_TTL, tags=["ai_recommendations"])
 def get_ai_recommendations(limit: int = Query(5, ge=1)):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -883,6 +899,7 @@ def compute_and_store_quick_stats():
 
     conn.commit()
     conn.close()
+    response_cache.invalidate("quick_stats")
 
     return {
         "total_contracts": total_contracts,
@@ -894,6 +911,7 @@ def compute_and_store_quick_stats():
     }
 
 @router.get("/api/dashboard/stats/quick", response_model=QuickStats)
+@cached_response(ttl=QUICK_STATS_TTL, tags=["quick_stats"])
 def get_latest_quick_stats():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -960,11 +978,13 @@ def seed_contracts_summary():
 
     conn.commit()
     conn.close()
+    response_cache.invalidate("contracts_summary")
 
     return {"message": "contracts_summary seeded successfully"}
 
 
 @router.get("/api/dashboard/contracts/summary", response_model=ContractSummary)
+@cached_response(ttl=CONTRACTS_SUMMARY_TTL, tags=["contracts_summary"])
 def get_contracts_summary():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -1240,26 +1260,91 @@ def seed_audit_logs():
     "message": "Audit logs inserted",
     "total": len(audit_log_records)
 }
-@router.get("/api/audit_logs_details", response_model=List[AuditLog])
-def get_audit_logs():
+def _fts_query(text: str) -> str:
+    # Quote every term so user input can't inject FTS5 syntax; a trailing
+    # '*' is kept as a prefix search. Terms are ANDed.
+    terms = []
+    for term in text.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+@router.get("/api/audit_logs_details", response_model=AuditLogPage)
+def get_audit_logs(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    user: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    action: Optional[str] = Query(None),
+    min_confidence: Optional[int] = Query(None, ge=0, le=100),
+    max_confidence: Optional[int] = Query(None, ge=0, le=100),
+    start: Optional[str] = Query(None, description="Inclusive lower timestamp bound, e.g. 2025-01-20"),
+    end: Optional[str] = Query(None, description="Exclusive upper timestamp bound"),
+    q: Optional[str] = Query(None, description="Free-text search over details")
+):
+    # Newest first, keyset-paginated on (timestamp, id).
+    query = """
+        SELECT id, timestamp, user, action, aiDecision, confidence, details, category
+        FROM audit_logs
+        WHERE 1=1
+    """
+    values = []
+    for column, value in (("user", user), ("category", category), ("action", action)):
+        if value:
+            query += f" AND {column} = ?"
+            values.append(value)
+    if min_confidence is not None:
+        query += " AND confidence >= ?"
+        values.append(min_confidence)
+    if max_confidence is not None:
+        query += " AND confidence <= ?"
+        values.append(max_confidence)
+    if start:
+        query += " AND timestamp >= ?"
+        values.append(start)
+    if end:
+        query += " AND timestamp < ?"
+        values.append(end)
+    if q:
+        match = _fts_query(q)
+        if not match:
+            raise HTTPException(status_code=400, detail="Empty search query")
+        query += " AND id IN (SELECT rowid FROM audit_logs_fts WHERE audit_logs_fts MATCH ?)"
+        values.append(match)
+    if cursor:
+        query += " AND (timestamp, id) < (?, ?)"
+        values.extend(decode_cursor(cursor, 2))
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    values.append(limit + 1)
+
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM audit_logs")
-    rows = cursor.fetchall()
+    db_cursor = conn.cursor()
+    db_cursor.execute(query, values)
+    rows = db_cursor.fetchall()
     conn.close()
 
-    return [
-        AuditLog(
-            id=row[0],
-            timestamp=row[1],
-            user=row[2],
-            action=row[3],
-            aiDecision=row[4],
-            confidence=row[5],
-            details=row[6],
-            category=row[7]
-        ) for row in rows
-    ]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+    return AuditLogPage(
+        logs=[
+            AuditLog(
+                id=row[0],
+                timestamp=row[1],
+                user=row[2],
+                action=row[3],
+                aiDecision=row[4],
+                confidence=row[5],
+                details=row[6],
+                category=row[7]
+            ) for row in rows
+        ],
+        next_cursor=next_cursor
+    )
 
 
 @router.post("/api/users/seed")
@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import INFERENCE_INTRA_OP_THREADS, INFERENCE_INTER_OP_THREADS, INFERENCE_POOLS
+
+
+# ──────────────────────────────────────────────────────────────────
+# CPU inference runtime
+#
+# torch, ONNX Runtime, MKL/OpenMP and BLAS each default to one thread
+# per core. With several models in one process and concurrent
+# requests that multiplies into heavy oversubscription. Instead:
+#   * every model call runs on a bounded, named worker pool
+#     (INFERENCE_POOLS), so at most sum(workers) calls run at once;
+#   * each call may use `intra_op_threads` threads, by default
+#     cores / sum(workers), so the pools together fill the box once.
+# configure_runtime() must run before torch does any work, i.e. at
+# the top of app.py; the OMP/MKL variables only take effect if set
+# before those libraries initialise.
+# ──────────────────────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_settings: Optional[Dict[str, Any]] = None
+_pools: Dict[str, ThreadPoolExecutor] = {}
+
+
+def _default_intra_op_threads() -> int:
+    total_workers = max(1, sum(INFERENCE_POOLS.values()))
+    return max(1, (os.cpu_count() or 1) // total_workers)
+
+
+def configure_runtime() -> Dict[str, Any]:
+    """Apply thread settings once per process and return them."""
+    global _settings
+    with _lock:
+        if _settings is not None:
+            return _settings
+
+        intra = INFERENCE_INTRA_OP_THREADS or _default_intra_op_threads()
+        inter = max(1, INFERENCE_INTER_OP_THREADS)
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ.setdefault(var, str(intra))
+
+        torch_applied = False
+        try:
+            import torch
+            torch.set_num_threads(intra)
+            try:
+                torch.set_num_interop_threads(inter)
+            except RuntimeError:
+                # Only allowed before the first parallel op; keep torch's value
+                inter = torch.get_num_interop_threads()
+            torch_applied = True
+        except ImportError:
+            pass
+
+        blas_applied = False
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=intra)
+            blas_applied = True
+        except ImportError:
+            pass
+
+        for name, workers in INFERENCE_POOLS.items():
+            _pools[name] = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"infer-{name}")
+
+        _settings = {
+            "cpu_count": os.cpu_count(),
+            "intra_op_threads": intra,
+            "inter_op_threads": inter,
+            "pools": dict(INFERENCE_POOLS),
+            "torch_applied": torch_applied,
+            "blas_applied": blas_applied,
+        }
+        return _settings
+
+
+def runtime_settings() -> Dict[str, Any]:
+    """Active settings, including what torch and the BLAS libraries report right now."""
+    settings = dict(configure_runtime())
+    try:
+        import torch
+        settings["torch_num_threads"] = torch.get_num_threads()
+        settings["torch_num_interop_threads"] = torch.get_num_interop_threads()
+    except ImportError:
+        pass
+    try:
+        from threadpoolctl import threadpool_info
+        settings["threadpools"] = [
+            {"user_api": info["user_api"], "internal_api": info["internal_api"], "num_threads": info["num_threads"]}
+            for info in threadpool_info()
+        ]
+    except ImportError:
+        pass
+    settings["env"] = {var: os.environ.get(var) for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")}
+    return settings
+
+
+def get_pool(name: str) -> ThreadPoolExecutor:
+    configure_runtime()
+    if name not in _pools:
+        raise KeyError(f"Unknown inference pool '{name}'; configured: {sorted(_pools)}")
+    return _pools[name]
+
+
+async def run_in_pool(name: str, func: Callable, *args, **kwargs):
+    """Run a blocking model call on the named pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(name), functools.partial(func, *args, **kwargs))
+
+
+def ort_session_options():
+    """SessionOptions for ONNX Runtime sessions, sized like the torch settings."""
+    import onnxruntime
+    settings = configure_runtime()
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = settings["intra_op_threads"]
+    options.inter_op_num_threads = settings["inter_op_threads"]
+    return options
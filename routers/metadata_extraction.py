@@ -1,14 +1,105 @@
 import re
 import os
+import datetime
+import itertools
+from decimal import Decimal, InvalidOperation
 import json
 import spacy
 from pathlib import Path
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+from transformers import AutoTokenizer, AutoModelForTokenClassification
+from routers.onnx_backend import load_pipeline
+from config import METADATA_EXTRACTION_MODE, NER_CHUNK_TOKENS, NER_CHUNK_OVERLAP, NER_BATCH_SIZE
+
+# spaCy components entity extraction does not need
+SPACY_DISABLED = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+DATE_PATTERN = r"\b(?:\d{1,2}[-/th\s\.]?)?(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[-/\s]?\d{2,4}\b|\b\d{4}[-/]\d{2}[-/]\d{2}\b"
+MONEY_PATTERN = r"\$\s?\d{1,3}(?:,\d{3})*(?:\.\d{2})?"
+# This pattern captures full IDs like CN-2023-001, AGMT123456, CON2021/55
+CONTRACT_NUMBER_PATTERN = r"\b(?:CN|CTR|AGMT|CON)[-/ ]?\d{3,}(?:[-/]\d+)?\b"
+# Simple contract type detection, in priority order
+CONTRACT_KEYWORDS = ["service agreement", "nda", "purchase order", "mou", "sow", "contract"]
+
+# Token kinds scan_tokens() reports. Each pattern runs on its own, so its
+# matches are exactly what its findall returns; no keyword's suffix is
+# another's prefix, so one alternation finds every keyword occurrence.
+TOKEN_PATTERNS = {
+    "date": re.compile(DATE_PATTERN, re.IGNORECASE),
+    "money": re.compile(MONEY_PATTERN),
+    "contract_number": re.compile(CONTRACT_NUMBER_PATTERN, re.IGNORECASE),
+    "contract_type": re.compile("|".join(re.escape(keyword) for keyword in CONTRACT_KEYWORDS), re.IGNORECASE),
+}
+# extract_metadata only reads the first one or two of each kind; the
+# contract type is a substring test. Stopping there is what keeps the
+# regex fields cheap on long documents.
+METADATA_TOKEN_LIMITS = {"date": 2, "money": 2, "contract_number": 1, "contract_type": 0}
+
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+DATE_PARTS = re.compile(r"(?:(\d{1,2})\D?)?\s*([A-Za-z]+)[-/\s]?(\d{2,4})$")
+ISO_DATE_PARTS = re.compile(r"(\d{4})[-/](\d{2})[-/](\d{2})$")
+YEAR_AFTER_DAY = re.compile(r",?\s*(\d{4})\b")
+
+
+def normalize_date(token, text="", end=0):
+    """ISO date for a DATE_PATTERN match, or None when it is not a real date."""
+    iso = ISO_DATE_PARTS.match(token)
+    if iso:
+        year, month, day = (int(part) for part in iso.groups())
+    else:
+        parts = DATE_PARTS.match(token.strip())
+        if not parts:
+            return None
+        day, word, number = parts.groups()
+        word = word.lower()
+        month = next((i + 1 for i, name in enumerate(MONTHS) if len(word) >= 3 and name.startswith(word)), None)
+        if month is None:
+            return None
+        # "March 15, 2024": the regex stops at the day; the year follows it
+        following = YEAR_AFTER_DAY.match(text, end) if day is None and len(number) <= 2 else None
+        if following:
+            day, year = int(number), int(following.group(1))
+        elif len(number) == 3:
+            return None
+        else:
+            day = int(day) if day else 1
+            year = int(number) + (2000 if len(number) == 2 else 0)
+    try:
+        return datetime.date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_amount(token):
+    try:
+        return Decimal(token.lstrip("$").replace(",", "").strip())
+    except InvalidOperation:
+        return None
 
 class ContractMetadataExtractor:
-    def __init__(self, spacy_model="en_core_web_sm", hf_model="dslim/bert-base-NER"):
-        self.nlp = spacy.load(spacy_model)
-        self.ner_pipeline = pipeline("ner", model=hf_model, tokenizer=hf_model, aggregation_strategy="simple")
+    DATE_PATTERN = TOKEN_PATTERNS["date"]
+    MONEY_PATTERN = TOKEN_PATTERNS["money"]
+    CONTRACT_NUMBER_PATTERN = TOKEN_PATTERNS["contract_number"]
+
+    # ── region-targeted NER ──
+    # Vendor names sit in the preamble, the defined-party parentheses and
+    # the signature block; dates and amounts are NER'd with their context.
+    PREAMBLE_CHARS = 1500
+    SIGNATURE_CHARS = 1500
+    REGION_RADIUS = 200
+    MAX_HITS_PER_PATTERN = 10
+    PARTY_PATTERN = re.compile(
+        r"\bby and (?:between|among)\b|\bhereinafter\b"
+        r"|\((?:the )?[\"“]?(?:contractor|vendor|supplier|agency|company|buyer|seller|client|provider|payee)[\"”]?\)",
+        re.IGNORECASE,
+    )
+    SIGNATURE_PATTERN = re.compile(r"\bin witness whereof\b|\bauthorized (?:signature|representative)\b", re.IGNORECASE)
+
+    def __init__(self, spacy_model="en_core_web_sm", hf_model="dslim/bert-base-NER", mode=METADATA_EXTRACTION_MODE):
+        self.nlp = spacy.load(spacy_model, disable=SPACY_DISABLED)
+        self.ner_pipeline = load_pipeline("ner", model=hf_model, tokenizer=hf_model, aggregation_strategy="simple")
+        # "regions": NER only on candidate windows; "full": NER over the whole document
+        self.mode = mode
 
     def clean_text(self, text):
         # Normalize spacing and remove artifacts
@@ -17,58 +108,207 @@ class ContractMetadataExtractor:
 
     def extract_dates(self, text):
         # Match common date formats
-        date_pattern = r"\b(?:\d{1,2}[-/th\s\.]?)?(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[-/\s]?\d{2,4}\b|\b\d{4}[-/]\d{2}[-/]\d{2}\b"
-        return re.findall(date_pattern, text, flags=re.IGNORECASE)
+        return self.DATE_PATTERN.findall(text)
 
     def extract_money(self, text):
-        money_pattern = r"\$\s?\d{1,3}(?:,\d{3})*(?:\.\d{2})?"
-        return re.findall(money_pattern, text)
+        return self.MONEY_PATTERN.findall(text)
 
     def extract_keywords(self, text):
         # Simple contract type detection
-        contract_keywords = ["service agreement", "nda", "purchase order", "mou", "sow", "contract"]
-        found = [k.title() for k in contract_keywords if k in text.lower()]
-        return found[0] if found else None
+        lowered = text.lower()
+        return next((k.title() for k in CONTRACT_KEYWORDS if k in lowered), None)
+
+    def candidate_regions(self, text):
+        """
+        (start, end) windows worth running NER on, sorted and merged: the
+        preamble, the signature block, and a radius around party definitions,
+        money amounts and dates.
+        """
+        n = len(text)
+        spans = [(0, min(n, self.PREAMBLE_CHARS)), (max(0, n - self.SIGNATURE_CHARS), n)]
+
+        signature = None
+        for signature in self.SIGNATURE_PATTERN.finditer(text):
+            pass  # keep the last one; earlier hits are usually references to it
+        if signature:
+            spans.append((signature.start(), min(n, signature.start() + self.SIGNATURE_CHARS)))
+
+        for pattern in (self.PARTY_PATTERN, self.MONEY_PATTERN, self.DATE_PATTERN):
+            for hit in itertools.islice(pattern.finditer(text), self.MAX_HITS_PER_PATTERN):
+                spans.append((max(0, hit.start() - self.REGION_RADIUS), min(n, hit.end() + self.REGION_RADIUS)))
+
+        merged = []
+        for start, end in sorted(spans):
+            # widen to word boundaries so no entity is cut in half
+            while start > 0 and not text[start - 1].isspace():
+                start -= 1
+            while end < n and not text[end].isspace():
+                end += 1
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _chunk_spans(self, text, start, end):
+        """
+        Split text[start:end] into NER_CHUNK_TOKENS-token chunks overlapping by
+        NER_CHUNK_OVERLAP tokens, as (chunk_start, chunk_end, own_start, own_end)
+        document offsets. Each overlap is split at its midpoint: a chunk only
+        reports entities starting inside its own range, so an entity cut off
+        at one chunk's edge is taken whole from its neighbour, and nothing is
+        reported twice.
+        """
+        offsets = self.ner_pipeline.tokenizer(
+            text[start:end], add_special_tokens=False, return_offsets_mapping=True
+        )["offset_mapping"]
+        if not offsets:
+            return []
+
+        step = max(1, NER_CHUNK_TOKENS - NER_CHUNK_OVERLAP)
+        windows, i = [], 0
+        while True:
+            j = min(i + NER_CHUNK_TOKENS, len(offsets))
+            windows.append((i, j))
+            if j == len(offsets):
+                break
+            i += step
 
-    def extract_entities(self, text):
-        doc = self.nlp(text)
-        spacy_entities = {ent.label_: ent.text for ent in doc.ents if ent.label_ in ["ORG", "DATE", "PERSON", "MONEY"]}
+        chunks = []
+        for k, (i, j) in enumerate(windows):
+            own_start = start if k == 0 else start + offsets[(i + windows[k - 1][1]) // 2][0]
+            own_end = end if k == len(windows) - 1 else start + offsets[(windows[k + 1][0] + j) // 2][0]
+            chunks.append((start + offsets[i][0], start + offsets[j - 1][1], own_start, own_end))
+        return chunks
 
-        hf_entities = self.ner_pipeline(text)
-        hf_entity_map = {}
-        for ent in hf_entities:
-            label = ent["entity_group"]
-            if label in ["ORG", "PER", "DATE", "MISC"]:
-                hf_entity_map[label] = ent["word"]
+    def extract_entity_spans(self, text, mode=None):
+        """
+        Every spaCy and HF NER entity with its document offsets, sorted by
+        position: {"label", "text", "start", "end", "score", "source"}.
+        NER runs over token-aware overlapping chunks of the candidate regions
+        (or of the whole text in "full" mode), batched through both models.
+        """
+        mode = mode or self.mode
+        regions = self.candidate_regions(text) if mode == "regions" else [(0, len(text))]
+        chunks = [chunk for start, end in regions for chunk in self._chunk_spans(text, start, end)]
+        if not chunks:
+            return []
+        chunk_texts = [text[c_start:c_end] for c_start, c_end, _, _ in chunks]
+
+        spans, seen = [], set()
+
+        def add(source, label, start, end, score, own_start, own_end):
+            key = (source, label, start, end)
+            if own_start <= start < own_end and key not in seen:
+                seen.add(key)
+                spans.append({
+                    "label": label, "text": text[start:end], "start": start, "end": end,
+                    "score": score, "source": source,
+                })
+
+        for (c_start, _, own_start, own_end), doc in zip(chunks, self.nlp.pipe(chunk_texts, batch_size=NER_BATCH_SIZE)):
+            for ent in doc.ents:
+                add("spacy", ent.label_, c_start + ent.start_char, c_start + ent.end_char, None, own_start, own_end)
+
+        for (c_start, _, own_start, own_end), hf_entities in zip(chunks, self.ner_pipeline(chunk_texts, batch_size=NER_BATCH_SIZE)):
+            for ent in hf_entities:
+                add("hf", ent["entity_group"], c_start + ent["start"], c_start + ent["end"], float(ent["score"]), own_start, own_end)
+
+        spans.sort(key=lambda span: (span["start"], span["end"]))
+        return spans
+
+    def extract_entities(self, text, mode=None):
+        """Last entity per label in document order (HF labels over spaCy), built from extract_entity_spans."""
+        spacy_entities, hf_entity_map = {}, {}
+        for span in self.extract_entity_spans(text, mode=mode):
+            if span["source"] == "spacy" and span["label"] in ["ORG", "DATE", "PERSON", "MONEY"]:
+                spacy_entities[span["label"]] = span["text"]
+            elif span["source"] == "hf" and span["label"] in ["ORG", "PER", "DATE", "MISC"]:
+                hf_entity_map[span["label"]] = span["text"]
 
         return {**spacy_entities, **hf_entity_map}
     
     def extract_contract_number(self, text):
-        # This pattern captures full IDs like CN-2023-001, AGMT123456, CON2021/55
-        contract_number_pattern = r"\b(?:CN|CTR|AGMT|CON)[-/ ]?\d{3,}(?:[-/]\d+)?\b"
-        matches = re.findall(contract_number_pattern, text, flags=re.IGNORECASE)
-        return matches[0] if matches else None
-    
+        match = self.CONTRACT_NUMBER_PATTERN.search(text)
+        return match.group(0) if match else None
+
+    def scan_tokens(self, text, limits=None):
+        """
+        Date, money, contract-number and contract-type tokens in document
+        order: {"kind", "text", "start", "end", "value"}. value is an ISO
+        date string, a Decimal, the upper-cased contract number, or the
+        title-cased contract type keyword. `limits` caps the tokens taken
+        per kind (the first N; default all).
+        """
+        limits = limits or {}
+        spans = []
+        for kind, pattern in TOKEN_PATTERNS.items():
+            for m in itertools.islice(pattern.finditer(text), limits.get(kind)):
+                spans.append((m.start(), kind, m.end()))
+        spans.sort()
+        tokens = []
+        for start, kind, end in spans:
+            token = text[start:end]
+            if kind == "date":
+                value = normalize_date(token, text, end)
+            elif kind == "money":
+                value = normalize_amount(token)
+            elif kind == "contract_number":
+                value = token.upper()
+            else:
+                value = token.lower().title()
+            tokens.append({"kind": kind, "text": token, "start": start, "end": end, "value": value})
+        return tokens
+
     def extract_metadata(self, text):
+        return self.extract_metadata_values(text)[0]
+
+    def extract_metadata_values(self, text):
+        """
+        (metadata, values): metadata is extract_metadata's dict of the
+        matched strings; values holds the same fields normalized (ISO
+        dates, Decimal amounts, upper-cased contract number) for storage.
+        """
         text = self.clean_text(text)
         entities = self.extract_entities(text)
-        dates = self.extract_dates(text)
-        money_values = self.extract_money(text)
+        tokens = self.scan_tokens(text, limits=METADATA_TOKEN_LIMITS)
+        dates = [t for t in tokens if t["kind"] == "date"]
+        money_values = [t for t in tokens if t["kind"] == "money"]
+        numbers = [t for t in tokens if t["kind"] == "contract_number"]
+        contract_type = self.extract_keywords(text)
 
-        metadata = {
-            "contract_type": self.extract_keywords(text),
-            "contract_number":self.extract_contract_number(text),
-            "vendor_name": entities.get("ORG") or entities.get("PER"),
+        picked = {
+            "contract_number": numbers[0] if numbers else None,
             "contract_value": money_values[0] if money_values else None,
             "threshold": money_values[1] if len(money_values) > 1 else None,
             "start_date": dates[0] if dates else None,
             "end_date": dates[1] if len(dates) > 1 else None,
         }
-        return metadata
-    
+        vendor_name = entities.get("ORG") or entities.get("PER")
+
+        metadata = {
+            "contract_type": contract_type,
+            "contract_number": None,
+            "vendor_name": vendor_name,
+            "contract_value": None,
+            "threshold": None,
+            "start_date": None,
+            "end_date": None,
+        }
+        values = dict(metadata)
+        for field, token in picked.items():
+            if token is not None:
+                metadata[field] = token["text"]
+                values[field] = token["value"]
+        return metadata, values
+
 
 if __name__ == "__main__":
+    from routers.clause_matching import TextProcessor
+    from routers.metadata_index import extract_or_load
+
     extractor = ContractMetadataExtractor()
+    textprocessor = TextProcessor()
     ocr_folder = "ocr_output"
     txt_files = [f for f in os.listdir(ocr_folder) if f.endswith("_ocr.txt")]
     metadata_dict = {}  #Step 1: Initialize dictionary
@@ -81,7 +321,7 @@ if __name__ == "__main__":
 
             with open(file_path, "r", encoding="utf-8") as f:
                 text = f.read()
-            metadata = extractor.extract_metadata(text)
+            metadata = extract_or_load(extractor, textprocessor.preprocess_text(text), source_file=filename)
             print("Extracted Contract Metadata:")
             for key, value in metadata.items():
                 print(f"  {key}: {value if value else 'Not found'}")
@@ -0,0 +1,138 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from config import DB_PATH
+from sqlite_db import create_contract_metadata_table
+
+
+# ──────────────────────────────────────────────────────────────────
+# Persisted contract metadata
+#
+# Extraction runs NER over the whole document, so its result is kept
+# in contract_metadata keyed by the sha256 of the document's
+# TextProcessor.preprocess_text output, whitespace collapsed. Every
+# caller (the upload route, the clause pipeline, the bulk metadata
+# run) preprocesses first, so one contract maps to one row. A document
+# seen before is answered from the table; lookups by vendor, type,
+# value or end date read the indexed columns and never touch the
+# models.
+# ──────────────────────────────────────────────────────────────────
+
+_schema_ready = set()
+
+
+def connect(db_path=DB_PATH) -> sqlite3.Connection:
+    # Bulk runs write from several worker processes; wait for the lock
+    conn = sqlite3.connect(db_path, timeout=30)
+    if str(db_path) not in _schema_ready:
+        create_contract_metadata_table(conn.cursor())
+        conn.commit()
+        _schema_ready.add(str(db_path))
+    return conn
+
+
+def document_hash(preprocessed_text: str) -> str:
+    """sha256 of preprocess_text output; only whitespace runs are normalised."""
+    return hashlib.sha256(" ".join(preprocessed_text.split()).encode("utf-8")).hexdigest()
+
+
+def _amount(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def load_metadata(doc_hash: str, db_path=DB_PATH) -> Optional[Dict[str, Any]]:
+    with connect(db_path) as conn:
+        row = conn.execute("SELECT metadata_json FROM contract_metadata WHERE doc_hash = ?", (doc_hash,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def upsert_metadata(doc_hash: str, metadata: Dict[str, Any], values: Dict[str, Any],
+                    source_file: Optional[str] = None, db_path=DB_PATH) -> None:
+    """Insert or replace the row for doc_hash; values are the normalized fields."""
+    with connect(db_path) as conn:
+        conn.execute("""
+            INSERT INTO contract_metadata (
+                doc_hash, source_file, vendor_name, contract_number, contract_type,
+                contract_value, threshold, start_date, end_date, metadata_json, extracted_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(doc_hash) DO UPDATE SET
+                source_file = COALESCE(excluded.source_file, source_file),
+                vendor_name = excluded.vendor_name,
+                contract_number = excluded.contract_number,
+                contract_type = excluded.contract_type,
+                contract_value = excluded.contract_value,
+                threshold = excluded.threshold,
+                start_date = excluded.start_date,
+                end_date = excluded.end_date,
+                metadata_json = excluded.metadata_json,
+                extracted_at = excluded.extracted_at
+        """, (
+            doc_hash, source_file, values.get("vendor_name"), values.get("contract_number"),
+            values.get("contract_type"), _amount(values.get("contract_value")), _amount(values.get("threshold")),
+            values.get("start_date"), values.get("end_date"), json.dumps(metadata),
+        ))
+
+
+def extract_or_load(extractor, text: str, source_file: Optional[str] = None,
+                    force: bool = False, db_path=DB_PATH) -> Dict[str, Any]:
+    """
+    extractor.extract_metadata(text), unless this document is already in
+    contract_metadata; new results are upserted. force re-extracts. text
+    must be TextProcessor.preprocess_text output, as on every other path.
+    """
+    doc_hash = document_hash(text)
+    if not force:
+        stored = load_metadata(doc_hash, db_path)
+        if stored is not None:
+            return stored
+    metadata, values = extractor.extract_metadata_values(text)
+    upsert_metadata(doc_hash, metadata, values, source_file=source_file, db_path=db_path)
+    return metadata
+
+
+def search_metadata(
+    vendor: Optional[str] = None,
+    contract_type: Optional[str] = None,
+    contract_number: Optional[str] = None,
+    ending_within_days: Optional[int] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    limit: int = 100,
+    db_path=DB_PATH,
+) -> List[Dict[str, Any]]:
+    """Stored rows matching every given filter, soonest end date first."""
+    query = """
+        SELECT doc_hash, source_file, vendor_name, contract_number, contract_type,
+               contract_value, threshold, start_date, end_date, extracted_at
+        FROM contract_metadata
+        WHERE 1=1
+    """
+    values = []
+    if vendor:
+        query += " AND vendor_name = ? COLLATE NOCASE"
+        values.append(vendor)
+    if contract_type:
+        query += " AND contract_type = ? COLLATE NOCASE"
+        values.append(contract_type)
+    if contract_number:
+        query += " AND contract_number = ? COLLATE NOCASE"
+        values.append(contract_number)
+    if ending_within_days is not None:
+        today = datetime.date.today()
+        query += " AND end_date >= ? AND end_date <= ?"
+        values += [today.isoformat(), (today + datetime.timedelta(days=ending_within_days)).isoformat()]
+    if min_value is not None:
+        query += " AND contract_value >= ?"
+        values.append(min_value)
+    if max_value is not None:
+        query += " AND contract_value <= ?"
+        values.append(max_value)
+    query += " ORDER BY end_date IS NULL, end_date, doc_hash LIMIT ?"
+    values.append(limit)
+
+    with connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute(query, values)]
@@ -1,7 +1,7 @@
 from config import DB_PATH, UPLOAD_FOLDER
 import sqlite3, os, shutil
-from fastapi import APIRouter, UploadFile, File, Form
-from typing import Dict,List
+from fastapi import APIRouter, UploadFile, File, Form, Query
+from typing import Dict,List,Optional
 from sqlite_db import init_db
 from enum import Enum
 from fastapi import Form
@@ -14,6 +14,7 @@ from fastapi.responses import FileResponse
 from fastapi import HTTPException
 import uuid
 from fpdf import FPDF
+from routers.pagination import encode_cursor, decode_cursor
 
 class ContractStatus(str, Enum):
     intake = "intake"
@@ -31,6 +32,10 @@ class ContractRequestItem(BaseModel):
     status: str
     date: str 
 
+class ContractRequestPage(BaseModel):
+    items: List[ContractRequestItem]
+    next_cursor: Optional[str] = None
+
 class ContractEditRequest(BaseModel):
     title: str
     agency: str
@@ -77,13 +82,19 @@ async def submit_contract(
 
 
 #----Endpoint to get the contract request lists APIs -----
-@router.get("/api/contracts_request_list", response_model=List[ContractRequestItem])
-def get_contract_request_list():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
+@router.get("/api/contracts_request_list", response_model=ContractRequestPage)
+def get_contract_request_list(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[str] = Query(None),
+    agency: Optional[str] = Query(None),
+    contract_type: Optional[str] = Query(None)
+):
+    # Keyset pagination on (created_at, id): each page seeks straight to
+    # the cursor position through one of the idx_contracts_* indexes.
+    query = """
         SELECT 
-            rowid,  -- This is the unique identifier
+            id,
             title, 
             agency, 
             contract_type, 
@@ -92,11 +103,35 @@ def get_contract_request_list():
             status, 
             created_at as date
         FROM contracts
-        ORDER BY created_at DESC
-    """)
-    rows = cursor.fetchall()
+        WHERE 1=1
+    """
+    values = []
+    if status:
+        query += " AND status = ?"
+        values.append(status)
+    if agency:
+        query += " AND agency = ?"
+        values.append(agency)
+    if contract_type:
+        query += " AND contract_type = ?"
+        values.append(contract_type)
+    if cursor:
+        query += " AND (created_at, id) < (?, ?)"
+        values.extend(decode_cursor(cursor, 2))
+    query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    values.append(limit + 1)
+
+    conn = sqlite3.connect(DB_PATH)
+    db_cursor = conn.cursor()
+    db_cursor.execute(query, values)
+    rows = db_cursor.fetchall()
     conn.close()
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][7], rows[-1][0])
+
     contract_items = []
     for row in rows:
         contract_items.append(ContractRequestItem(
@@ -109,7 +144,7 @@ def get_contract_request_list():
             status=row[6],
             date=row[7]
         ))
-    return contract_items
+    return ContractRequestPage(items=contract_items, next_cursor=next_cursor)
 
 # #----- endpoint to create the contract draft -----
 # @router.post("/contract/draft")
@@ -206,20 +241,49 @@ def get_contract_summary():
         summary[status] = count
     return summary
 
+MAX_CYCLE_TIME_MONTHS = 120
+
+def _parse_month(value: str, param: str):
+    try:
+        parsed = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{param}' must be formatted as YYYY-MM")
+    return parsed.year, parsed.month
+
 @router.get("/api/dashboard/metrics/cycle-time")
-def get_cycle_time_metrics():
+def get_cycle_time_metrics(
+    from_month: Optional[str] = Query(None, alias="from", description="First month, YYYY-MM (default: 11 months before 'to')"),
+    to_month: Optional[str] = Query(None, alias="to", description="Last month, YYYY-MM (default: current month)")
+):
+    if to_month:
+        to_year, to_mon = _parse_month(to_month, "to")
+    else:
+        now = datetime.utcnow()
+        to_year, to_mon = now.year, now.month
+    if from_month:
+        from_year, from_mon = _parse_month(from_month, "from")
+    else:
+        from_year, from_mon = divmod(to_year * 12 + to_mon - 1 - 11, 12)
+        from_mon += 1
+
+    span = (to_year * 12 + to_mon) - (from_year * 12 + from_mon) + 1
+    if span < 1:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if span > MAX_CYCLE_TIME_MONTHS:
+        raise HTTPException(status_code=400, detail=f"Range may span at most {MAX_CYCLE_TIME_MONTHS} months")
+
+    start_key = f"{from_year:04d}-{from_mon:02d}"
+    end_key = f"{to_year:04d}-{to_mon:02d}"
+
+    # contract_monthly_counts is maintained by triggers on contracts, so this
+    # is a primary-key range read over at most `span` months.
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-
     cursor.execute("""
-        SELECT 
-            strftime('%m', created_at) as month_num,
-            status,
-            COUNT(*) as count
-        FROM contracts
-        GROUP BY month_num, status
-        ORDER BY month_num
-    """)
+        SELECT month, status, count
+        FROM contract_monthly_counts
+        WHERE month BETWEEN ? AND ?
+    """, (start_key, end_key))
     rows = cursor.fetchall()
     conn.close()
 
@@ -231,16 +295,17 @@ def get_cycle_time_metrics():
         "closeout": 0
     })
 
-    for month_num, status, count in rows:
-        month_abbr_name = month_abbr[int(month_num)]
-        if status in month_status_counts[month_abbr_name]:
-            month_status_counts[month_abbr_name][status] = count
+    for month_key, status, count in rows:
+        if status in month_status_counts[month_key]:
+            month_status_counts[month_key][status] = count
 
-    # Format result for frontend
+    # Format result for frontend, one entry per month in the window
     cycle_time_data = []
-    for month in sorted(month_status_counts.keys(), key=lambda m: list(month_abbr).index(m)):
-        entry = {"month": month}
-        entry.update(month_status_counts[month])
+    for offset in range(span):
+        year, month_index = divmod(from_year * 12 + from_mon - 1 + offset, 12)
+        month_key = f"{year:04d}-{month_index + 1:02d}"
+        entry = {"month": month_abbr[month_index + 1], "year": year, "period": month_key}
+        entry.update(month_status_counts[month_key])
         cycle_time_data.append(entry)
 
-    return {"cycle_time_data": cycle_time_data}
+    return {"from": start_key, "to": end_key, "cycle_time_data": cycle_time_data}
\ No newline at end of file
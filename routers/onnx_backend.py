@@ -0,0 +1,169 @@
+import functools
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from transformers import AutoTokenizer, pipeline
+
+from config import ONNX_MODELS, ONNX_CACHE_DIR, ONNX_QUANTIZE, ONNX_QUANT_ARCH
+from routers.inference_runtime import ort_session_options
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────────────
+# ONNX Runtime backend for the HF pipelines
+#
+# Models listed in ONNX_MODELS are exported to ONNX once, optionally
+# dynamic-int8 quantized, and cached under ONNX_CACHE_DIR; later
+# loads read the cached graph directly. load_pipeline() is a drop-in
+# for transformers.pipeline() and falls back to PyTorch for models not
+# listed, or when optimum / onnxruntime are not installed.
+# ──────────────────────────────────────────────────────────────────
+
+# optimum.onnxruntime class per pipeline task
+ORT_MODEL_CLASSES = {
+    "text-classification": "ORTModelForSequenceClassification",
+    "summarization": "ORTModelForSeq2SeqLM",
+    "text2text-generation": "ORTModelForSeq2SeqLM",
+    "question-answering": "ORTModelForQuestionAnswering",
+    "ner": "ORTModelForTokenClassification",
+    "token-classification": "ORTModelForTokenClassification",
+    "feature-extraction": "ORTModelForFeatureExtraction",
+}
+
+
+def onnx_enabled(model: str) -> bool:
+    return "*" in ONNX_MODELS or model in ONNX_MODELS
+
+
+def _cache_path(model: str, variant: str) -> Path:
+    return Path(ONNX_CACHE_DIR) / model.replace("/", "--") / variant
+
+
+def _quantization_config():
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    factories = {
+        "avx2": AutoQuantizationConfig.avx2,
+        "avx512": AutoQuantizationConfig.avx512,
+        "avx512_vnni": AutoQuantizationConfig.avx512_vnni,
+        "arm64": AutoQuantizationConfig.arm64,
+    }
+    if ONNX_QUANT_ARCH not in factories:
+        raise ValueError(f"Unknown ONNX_QUANT_ARCH: {ONNX_QUANT_ARCH}")
+    return factories[ONNX_QUANT_ARCH](is_static=False, per_channel=False)
+
+
+def _export(model: str, ort_class) -> Path:
+    """Export the model to ONNX (and quantize it) into the cache; returns the directory to load."""
+    variant = f"int8-{ONNX_QUANT_ARCH}" if ONNX_QUANTIZE else "fp32"
+    target = _cache_path(model, variant)
+    if target.exists():
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Build in a temp dir next to the target and rename, so a crash never
+    # leaves a half-written model that later loads would trust.
+    work_dir = Path(tempfile.mkdtemp(dir=target.parent, prefix=".export-"))
+    try:
+        fp32_dir = work_dir / "fp32"
+        ort_model = ort_class.from_pretrained(model, export=True)
+        ort_model.save_pretrained(fp32_dir)
+        AutoTokenizer.from_pretrained(model).save_pretrained(fp32_dir)
+
+        if ONNX_QUANTIZE:
+            from optimum.onnxruntime import ORTQuantizer
+            built = work_dir / "int8"
+            qconfig = _quantization_config()
+            # Seq2seq exports are several graphs (encoder, decoder, decoder_with_past)
+            for onnx_file in sorted(fp32_dir.glob("*.onnx")):
+                quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=onnx_file.name)
+                # Empty suffix keeps the exported file names, so the default loader finds them
+                quantizer.quantize(save_dir=built, quantization_config=qconfig, file_suffix="")
+            for extra in fp32_dir.iterdir():
+                if extra.suffix != ".onnx" and not (built / extra.name).exists():
+                    if extra.is_file():
+                        shutil.copy2(extra, built / extra.name)
+        else:
+            built = fp32_dir
+
+        os.replace(built, target)
+        logger.info("Exported %s to ONNX (%s) at %s", model, variant, target)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return target
+
+
+def load_pipeline(task: str, model: str, tokenizer: Optional[str] = None, **kwargs):
+    """
+    transformers.pipeline(task, model=..., **kwargs), served by ONNX Runtime
+    when `model` is enabled in ONNX_MODELS.
+    """
+    if onnx_enabled(model) and task in ORT_MODEL_CLASSES:
+        try:
+            import optimum.onnxruntime as ort
+        except ImportError:
+            logger.warning("optimum[onnxruntime] not installed; running %s on PyTorch", model)
+        else:
+            ort_class = getattr(ort, ORT_MODEL_CLASSES[task])
+            model_dir = _export(model, ort_class)
+            kwargs.pop("device", None)  # ORT sessions pick their execution provider themselves
+            return pipeline(
+                task,
+                model=ort_class.from_pretrained(model_dir, session_options=ort_session_options()),
+                tokenizer=AutoTokenizer.from_pretrained(model_dir),
+                **kwargs,
+            )
+    return pipeline(task, model=model, tokenizer=tokenizer, **kwargs)
+
+
+def embeddings_backend(model_name: str) -> str:
+    """
+    What load_embeddings runs model_name on: "pytorch", "onnx-fp32" or
+    "onnx-int8-<arch>". Each one embeds into a slightly different space, so
+    anything cached from the vectors (passage embeddings, retrievals) must be
+    keyed on it as well as on the model.
+    """
+    if not onnx_enabled(model_name):
+        return "pytorch"
+    try:
+        import optimum.onnxruntime  # noqa: F401  (sentence-transformers' ONNX backend needs it)
+    except ImportError:
+        return "pytorch"
+    return f"onnx-int8-{ONNX_QUANT_ARCH}" if ONNX_QUANTIZE else "onnx-fp32"
+
+
+@functools.lru_cache(maxsize=None)
+def shared_embeddings(model_name: str):
+    """load_embeddings(model_name), loaded once per process for every caller."""
+    return load_embeddings(model_name)
+
+
+def load_embeddings(model_name: str):
+    """
+    LangChain HuggingFaceEmbeddings for a sentence-transformers model, on the
+    sentence-transformers ONNX backend when the model is enabled in ONNX_MODELS.
+    """
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if embeddings_backend(model_name) == "pytorch":
+        if onnx_enabled(model_name):
+            logger.warning("optimum[onnxruntime] not installed; running %s on PyTorch", model_name)
+        return HuggingFaceEmbeddings(model_name=model_name)
+
+    target = _cache_path(model_name, "sentence-transformers")
+    file_name = f"onnx/model_qint8_{ONNX_QUANT_ARCH}.onnx" if ONNX_QUANTIZE else "onnx/model.onnx"
+    if not (target / file_name).exists():
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+        st_model = SentenceTransformer(model_name, backend="onnx")
+        st_model.save(str(target))
+        if ONNX_QUANTIZE:
+            export_dynamic_quantized_onnx_model(st_model, ONNX_QUANT_ARCH, str(target))
+
+    return HuggingFaceEmbeddings(
+        model_name=str(target),
+        model_kwargs={"backend": "onnx", "model_kwargs": {"file_name": file_name}},
+    )
@@ -0,0 +1,33 @@
+import base64
+import json
+from typing import Any, List
+
+from fastapi import HTTPException
+
+
+# ──────────────────────────────────────────────────────────────────
+# Opaque keyset cursors
+#
+# A cursor is the sort key of the last row on a page, e.g.
+# (created_at, id), JSON-encoded and base64'd so clients treat it as
+# an opaque token and pass it back unchanged. Anything else a client
+# sends back is a 400, never a bad bind parameter.
+# ──────────────────────────────────────────────────────────────────
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Sort keys are SQLite scalars; a nested list or object can't be bound
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import re
+import sqlite3
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+from config import DB_PATH, REGULATION_PASSAGE_WORDS
+from routers.regulation_index import split_sections, split_paragraphs, pack_passages, section_body
+from routers.retrieval_cache import index_hash
+from sqlite_db import create_regulation_versions_table
+
+
+# ──────────────────────────────────────────────────────────────────
+# Regulation corpus
+#
+# Every regulation source (each .txt in a folder, or a single file) is
+# normalized (Unicode NFC, LF line endings, no trailing whitespace,
+# at most one blank line in a row) and fingerprinted before anything
+# is split or embedded. Sources with the same fingerprint are read
+# once: clause_compliance/DFARS.txt and far_dfars.txt differ only by a
+# trailing newline. Across the remaining sources, a paragraph already
+# seen under the same section number is dropped, so a newer edition
+# next to an older one only adds what changed. The version id hashes
+# the unique fingerprints with the index parameters; passage
+# embeddings are cached under it and every build is recorded in
+# regulation_versions.
+# ──────────────────────────────────────────────────────────────────
+
+_BLANK_RUNS = re.compile(r"\n{3,}")
+
+
+def normalize_regulation(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return _BLANK_RUNS.sub("\n\n", text).strip() + "\n"
+
+
+def text_fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RegulationCorpus:
+    def __init__(self, path, db_path=DB_PATH):
+        path = Path(path)
+        self.db_path = db_path
+        self.sources: List[Dict[str, Any]] = []
+        texts: Dict[str, str] = {}
+        for source in (sorted(path.glob("*.txt")) if path.is_dir() else [path]):
+            raw = source.read_bytes()
+            text = normalize_regulation(raw.decode("utf-8"))
+            fingerprint = text_fingerprint(text)
+            first = next((s["path"] for s in self.sources if s["fingerprint"] == fingerprint), None)
+            self.sources.append({"path": str(source), "fingerprint": fingerprint, "bytes": len(raw), "duplicate_of": first})
+            texts.setdefault(fingerprint, text)
+        if not texts:
+            raise FileNotFoundError(f"No regulation text under {path}")
+
+        # Ordered by fingerprint, not file name: renaming a source keeps the version
+        self.texts = [texts[fp] for fp in sorted(texts)]
+        self.fingerprint = index_hash(*sorted(texts))
+        self.paragraphs = 0
+        self.duplicate_paragraphs = 0
+
+    @property
+    def text(self) -> str:
+        """The unique sources as one text (the dense retriever's token windows run over it)."""
+        return "\n\n".join(self.texts)
+
+    def version(self, retrieval: str, *params) -> str:
+        """
+        Id of an index built from this corpus in `retrieval` mode with these
+        parameters. They must name everything the chunks' vectors depend on:
+        the embedding model and its embeddings_backend() as well as chunking.
+        """
+        return index_hash(self.fingerprint, retrieval, *params)[:16]
+
+    def passages(self, max_words: int = REGULATION_PASSAGE_WORDS) -> List[Dict[str, str]]:
+        """Section-aware passages (RegulationIndex input), each paragraph of a section indexed once."""
+        passages, seen, per_section = [], set(), Counter()
+        self.paragraphs = self.duplicate_paragraphs = 0
+        for text in self.texts:
+            for section_id, title, start, end in split_sections(text):
+                paragraphs = split_paragraphs(section_body(text, start, end))
+                unique = []
+                for paragraph in paragraphs:
+                    key = hashlib.sha1(f"{section_id}\x1f{' '.join(paragraph.split())}".encode("utf-8")).digest()
+                    if key not in seen:
+                        seen.add(key)
+                        unique.append(paragraph)
+                self.paragraphs += len(paragraphs)
+                self.duplicate_paragraphs += len(paragraphs) - len(unique)
+                if not unique and per_section[section_id]:
+                    continue  # nothing this source adds to a section already indexed
+                for passage in pack_passages(unique, max_words) or [""]:
+                    # A few section numbers occur twice in the text; numbering runs on
+                    passages.append({
+                        "chunk_id": f"{section_id}#{per_section[section_id]}",
+                        "section_id": section_id,
+                        "title": title,
+                        "text": passage,
+                    })
+                    per_section[section_id] += 1
+        return passages
+
+    def record(self, version: str, retrieval: str, chunks: int) -> None:
+        """Note that `version` was built (or loaded again) with `chunks` chunks."""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            create_regulation_versions_table(conn.cursor())
+            conn.execute(
+                """INSERT INTO regulation_versions
+                   (version, retrieval, corpus_fingerprint, sources_json, chunks, paragraphs, duplicate_paragraphs)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(version) DO UPDATE SET loaded_at = datetime('now'), sources_json = excluded.sources_json""",
+                (version, retrieval, self.fingerprint, json.dumps(self.sources), chunks,
+                 self.paragraphs or None, self.duplicate_paragraphs or None),
+            )
+
+
+def list_versions(db_path=DB_PATH) -> List[Dict[str, Any]]:
+    """Recorded regulation index builds, most recently loaded first."""
+    with sqlite3.connect(db_path, timeout=30) as conn:
+        create_regulation_versions_table(conn.cursor())
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("SELECT * FROM regulation_versions ORDER BY loaded_at DESC, built_at DESC").fetchall()
+    versions = []
+    for row in rows:
+        version = dict(row)
+        version["sources"] = json.loads(version.pop("sources_json"))
+        versions.append(version)
+    return versions
@@ -0,0 +1,230 @@
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import REGULATION_INDEX_DIR, REGULATION_PASSAGE_WORDS, REGULATION_FUSION_DEPTH
+
+
+# ──────────────────────────────────────────────────────────────────
+# Section-aware FAR/DFARS index
+#
+# The regulation text is split on its section headings ("252.204-7012
+# Safeguarding covered defense information ..."), sections are cut
+# into passages of at most REGULATION_PASSAGE_WORDS words on paragraph
+# boundaries, and every passage carries its section id and title.
+# Two rankings are kept side by side:
+#   * BM25 over an inverted index of passage terms (exact wording,
+#     clause numbers, defined terms);
+#   * dense cosine similarity over normalised passage embeddings.
+# A query is answered by reciprocal-rank fusion of the two. Section
+# numbers cited in the query ("DFARS 252.204-7012") are looked up in
+# the section map directly and returned first.
+# ──────────────────────────────────────────────────────────────────
+
+# A heading line: section number, whitespace, a title starting upper-case
+SECTION_HEADING = re.compile(r"^(\d{1,3}\.\d{1,4}(?:-\d{1,4})?)[ \t]+([A-Z][^\n]*)$", re.M)
+# Section numbers inside free text
+SECTION_REFERENCE = re.compile(r"(?<![\d.])(\d{2,3}\.\d{3,4}(?:-\d{1,4})?)(?![\d])")
+TERM = re.compile(r"[a-z0-9]+(?:[.-][a-z0-9]+)*")
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def _part(section_id: str) -> str:
+    return section_id.split(".", 1)[0]
+
+
+def split_sections(text: str) -> List[Tuple[str, str, int, int]]:
+    """(section_id, title, start, end) per heading; text before the first heading is skipped."""
+    candidates = list(SECTION_HEADING.finditer(text))
+    headings = []
+    for i, match in enumerate(candidates):
+        part = _part(match.group(1))
+        previous = _part(headings[-1].group(1)) if headings else None
+        following = _part(candidates[i + 1].group(1)) if i + 1 < len(candidates) else None
+        # A cross-reference wrapped onto the start of a line looks like a
+        # heading but jumps to another part and straight back
+        if previous is not None and part != previous and part != following:
+            continue
+        headings.append(match)
+    return [
+        (m.group(1), m.group(2).strip(), m.start(), headings[i + 1].start() if i + 1 < len(headings) else len(text))
+        for i, m in enumerate(headings)
+    ]
+
+
+def split_paragraphs(body: str) -> List[str]:
+    """Blank-line separated paragraphs; "(a)", "(1)" ... list items start a paragraph too."""
+    return [p.strip() for p in re.split(r"\n\s*\n|\n(?=\([a-z0-9]+\)\s)", body) if p.strip()]
+
+
+def pack_passages(paragraphs: Sequence[str], max_words: int = REGULATION_PASSAGE_WORDS) -> List[str]:
+    """Paragraphs packed into passages of at most max_words words (longer paragraphs are cut by words)."""
+    passages, current, size = [], [], 0
+    for paragraph in paragraphs:
+        words = paragraph.split()
+        if not words:
+            continue
+        while len(words) > max_words:
+            if current:
+                passages.append(" ".join(current))
+                current, size = [], 0
+            passages.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if size + len(words) > max_words and current:
+            passages.append(" ".join(current))
+            current, size = [], 0
+        current.extend(words)
+        size += len(words)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def split_passages(body: str, max_words: int = REGULATION_PASSAGE_WORDS) -> List[str]:
+    """Paragraph-aligned passages of at most max_words words."""
+    return pack_passages(split_paragraphs(body), max_words)
+
+
+def section_body(text: str, start: int, end: int) -> str:
+    """A section's text without its heading line (carried in section_id / title)."""
+    section = text[start:end]
+    return section.split("\n", 1)[1] if "\n" in section else ""
+
+
+def tokenize(text: str) -> List[str]:
+    return TERM.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, texts: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        postings = defaultdict(lambda: ([], []))
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                docs, tfs = postings[term]
+                docs.append(doc)
+                tfs.append(tf)
+
+        self.size = len(texts)
+        avgdl = float(lengths.mean()) if len(texts) else 0.0
+        norm = k1 * (1 - b + b * lengths / max(avgdl, 1e-9))
+        # Per-posting BM25 weight, so a query is one scatter-add per term
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, (docs, tfs) in postings.items():
+            docs = np.asarray(docs, dtype=np.int32)
+            tfs = np.asarray(tfs, dtype=np.float32)
+            idf = math.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[term] = (docs, (idf * tfs * (k1 + 1) / (tfs + norm[docs])).astype(np.float32))
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in self.postings:
+                docs, weights = self.postings[term]
+                scores[docs] += weights
+        return scores
+
+
+def _top(scores: np.ndarray, n: int, floor: Optional[float] = None) -> np.ndarray:
+    n = min(n, len(scores))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, n - 1)[:n]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top if floor is None else top[scores[top] > floor]
+
+
+class RegulationIndex:
+    def __init__(self, passages: List[Dict[str, str]], vectors: np.ndarray, embedder):
+        """
+        `passages` are dicts with chunk_id, section_id, title and text; `vectors`
+        their L2-normalised embeddings (same order); `embedder` embeds queries.
+        """
+        self.passages = passages
+        self.vectors = vectors
+        self.embedder = embedder
+        self.bm25 = BM25Index([f"{p['section_id']} {p['title']} {p['text']}" for p in passages])
+        self.sections: Dict[str, List[int]] = defaultdict(list)
+        for i, passage in enumerate(passages):
+            self.sections[passage["section_id"]].append(i)
+
+    @classmethod
+    def from_passages(cls, passages: List[Dict[str, str]], embedder, cache_key: str,
+                      cache_dir=REGULATION_INDEX_DIR) -> "RegulationIndex":
+        """
+        Index `passages`; their embeddings (the slow part of a build) are
+        kept in cache_dir under cache_key, which must change whenever the
+        passages or the embedding model do.
+        """
+        cache_path = Path(cache_dir) / f"{cache_key}.npy"
+        if cache_path.exists():
+            vectors = np.load(cache_path)
+        else:
+            vectors = np.asarray(embedder.embed_documents([cls.passage_text(p) for p in passages]), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp.npy")
+            np.save(tmp_path, vectors)
+            os.replace(tmp_path, cache_path)
+        return cls(passages, vectors, embedder)
+
+    @staticmethod
+    def passage_text(passage: Dict[str, str]) -> str:
+        """What the LLM and the embedder see: the section heading, then the passage."""
+        return f"{passage['section_id']} {passage['title']}\n{passage['text']}"
+
+    # ─────────────── lookups ───────────────
+    def section_passages(self, section_id: str) -> List[int]:
+        return self.sections.get(section_id, [])
+
+    def cited_sections(self, text: str) -> List[str]:
+        """Section numbers in text that exist in this index, in order of appearance."""
+        return [s for s in dict.fromkeys(SECTION_REFERENCE.findall(text)) if s in self.sections]
+
+    def search_batch(self, queries: Sequence[str], k: int = 4) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k (passage index, confidence) per query. Passages of sections the
+        query cites come first (confidence 1.0); the rest is the RRF fusion
+        of the BM25 and dense rankings, with the passage's cosine similarity
+        to the query as its confidence.
+        """
+        if not queries:
+            return []
+        query_vectors = np.asarray(self.embedder.embed_documents(list(queries)), dtype=np.float32)
+        norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        dense_scores = (query_vectors / norms) @ self.vectors.T
+
+        results = []
+        for query, cosine in zip(queries, dense_scores):
+            # Cited sections first, their opening passages ahead of any continuation
+            cited = [(n, i) for section in self.cited_sections(query) for n, i in enumerate(self.section_passages(section))]
+            picked = [(i, 1.0) for _, i in sorted(cited, key=lambda c: c[0])][:k]
+            if len(picked) < k:
+                fused = defaultdict(float)
+                for ranking in (_top(self.bm25.scores(query), REGULATION_FUSION_DEPTH, floor=0.0),
+                                _top(cosine, REGULATION_FUSION_DEPTH)):
+                    for rank, i in enumerate(ranking):
+                        fused[int(i)] += 1.0 / (RRF_K + rank + 1)
+                seen = {i for i, _ in picked}
+                for i in sorted(fused, key=lambda i: (-fused[i], i)):
+                    if len(picked) == k:
+                        break
+                    if i not in seen:
+                        picked.append((i, round(float(cosine[i]), 3)))
+            results.append(picked)
+        return results
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        return self.search_batch([query], k=k)[0]
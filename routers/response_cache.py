@@ -0,0 +1,265 @@
+import functools
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import Response
+from pydantic import TypeAdapter, ValidationError
+
+from config import RESPONSE_CACHE_DB
+
+
+# ──────────────────────────────────────────────────────────────────
+# Response cache for polled GET endpoints
+#
+# Entries are keyed by route path + sorted query params and carry a
+# set of tags naming the tables they were built from. Writers call
+# invalidate(<tag>) after committing, which drops every entry built
+# from that table. When RESPONSE_CACHE_DB is set, a shared SQLite
+# tier lets several uvicorn workers see each other's entries and
+# invalidations; otherwise the cache is purely in-process.
+# Tag versions are read before the endpoint runs and checked again
+# when its body is stored: a body computed across an invalidation is
+# served once but not cached. Bodies are validated and encoded
+# through the route's response_model, as FastAPI would.
+# ──────────────────────────────────────────────────────────────────
+
+class _Entry:
+    __slots__ = ("body", "etag", "expires_at", "tags", "versions")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float, tags: Tuple[str, ...], versions: Dict[str, int]):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.tags = tags
+        self.versions = versions
+
+
+class ResponseCache:
+    def __init__(self, shared_db_path: Optional[str] = None):
+        self._entries: Dict[str, _Entry] = {}
+        self._local_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.shared_db_path = str(shared_db_path) if shared_db_path else None
+        if self.shared_db_path:
+            self._init_shared_tier()
+
+    # ─────────────── Shared (on-disk) tier ───────────────
+    def _connect(self):
+        conn = sqlite3.connect(self.shared_db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_shared_tier(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    etag TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    tags TEXT NOT NULL,
+                    versions TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache_tags (
+                    tag TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    def _tag_versions(self, tags: Iterable[str], conn=None) -> Dict[str, int]:
+        tags = list(tags)
+        if not tags:
+            return {}
+        if not self.shared_db_path:
+            with self._lock:
+                return {tag: self._local_versions.get(tag, 0) for tag in tags}
+        if conn is None:
+            with self._connect() as conn:
+                return self._tag_versions(tags, conn)
+        rows = conn.execute(
+            f"SELECT tag, version FROM response_cache_tags WHERE tag IN ({','.join('?' * len(tags))})",
+            tags,
+        ).fetchall()
+        versions = {tag: 0 for tag in tags}
+        versions.update(dict(rows))
+        return versions
+
+    def _shared_get(self, key: str) -> Optional[_Entry]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT etag, body, tags, versions, expires_at FROM response_cache WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+        if not row or row[4] <= time.time():
+            return None
+        tags = tuple(json.loads(row[2]))
+        return _Entry(row[1], row[0], row[4], tags, json.loads(row[3]))
+
+    def _shared_set(self, key: str, entry: _Entry) -> bool:
+        """Store entry unless one of its tags was invalidated since entry.versions was read."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._tag_versions(entry.tags, conn) != entry.versions:
+                return False
+            conn.execute("""
+                INSERT OR REPLACE INTO response_cache (cache_key, etag, body, tags, versions, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (key, entry.etag, entry.body, json.dumps(entry.tags), json.dumps(entry.versions), entry.expires_at))
+        return True
+
+    # ─────────────── Public API ───────────────
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.time():
+            entry = None
+        if self.shared_db_path:
+            if entry is None:
+                entry = self._shared_get(key)
+            # Another worker may have invalidated one of our tags since
+            # this entry was built.
+            if entry is not None and self._tag_versions(entry.tags) != entry.versions:
+                entry = None
+            if entry is not None:
+                with self._lock:
+                    self._entries[key] = entry
+        if entry is None:
+            with self._lock:
+                self._entries.pop(key, None)
+        return entry
+
+    def versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        """Current tag versions; read before building a body and pass to set()."""
+        return self._tag_versions(tags)
+
+    def set(self, key: str, body: bytes, ttl: float, tags: Tuple[str, ...], versions: Dict[str, int]) -> _Entry:
+        """
+        Cache body under key. `versions` are the tag versions read before the
+        body was built; if a tag has been invalidated since, the entry is
+        returned (to answer this request) but not stored.
+        """
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        entry = _Entry(body, etag, time.time() + ttl, tags, versions)
+        if self.shared_db_path:
+            if self._shared_set(key, entry):
+                with self._lock:
+                    self._entries[key] = entry
+            return entry
+        with self._lock:
+            if {tag: self._local_versions.get(tag, 0) for tag in tags} == versions:
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self, *tags: str):
+        """Drop every cached response built from any of the given tags."""
+        with self._lock:
+            for tag in tags:
+                self._local_versions[tag] = self._local_versions.get(tag, 0) + 1
+            stale = [k for k, e in self._entries.items() if set(e.tags) & set(tags)]
+            for key in stale:
+                del self._entries[key]
+        if self.shared_db_path:
+            with self._connect() as conn:
+                for tag in tags:
+                    conn.execute("""
+                        INSERT INTO response_cache_tags (tag, version) VALUES (?, 1)
+                        ON CONFLICT(tag) DO UPDATE SET version = version + 1
+                    """, (tag,))
+                    conn.execute(
+                        "DELETE FROM response_cache WHERE tags LIKE ?",
+                        ('%' + json.dumps(tag) + '%',),
+                    )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared_db_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM response_cache")
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_DB)
+
+
+# ---------- helpers ----------
+def _cache_key(request: Request) -> str:
+    params = sorted(request.query_params.multi_items())
+    return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or ("W/" + etag) in candidates
+
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _encode(request: Request, result: Any) -> Any:
+    """result validated against the matched route's response_model (if any), then JSON-encoded."""
+    model = getattr(request.scope.get("route"), "response_model", None)
+    if model is not None:
+        if model not in _adapters:
+            _adapters[model] = TypeAdapter(model)
+        try:
+            result = _adapters[model].validate_python(result, from_attributes=True)
+        except ValidationError as e:
+            raise ResponseValidationError(e.errors(), body=result)
+    return jsonable_encoder(result)
+
+
+def _respond(request: Request, entry: _Entry, ttl: float) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": f"private, max-age={int(ttl)}"}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cached_response(ttl: float, tags: Iterable[str] = ()) -> Callable:
+    """
+    Cache a GET endpoint's JSON body for `ttl` seconds, keyed by route and
+    query params. Answers If-None-Match with 304 when the cached ETag still
+    matches, without calling the endpoint.
+    """
+    tags = tuple(tags)
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        params = list(signature.parameters.values())
+        request_param = next((p.name for p in params if p.annotation is Request), None)
+        if request_param is None:
+            params.append(inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            request = kwargs[request_param] if request_param else kwargs.pop("_cache_request")
+            key = _cache_key(request)
+
+            entry = response_cache.get(key)
+            if entry is None:
+                # Read before the query runs, so an invalidation during it keeps the body out of the cache
+                versions = response_cache.versions(tags)
+                result = func(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+                body = json.dumps(_encode(request, result), separators=(",", ":")).encode("utf-8")
+                entry = response_cache.set(key, body, ttl, tags, versions)
+            return _respond(request, entry, ttl)
+
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    return decorator
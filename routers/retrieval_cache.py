@@ -0,0 +1,146 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from config import DB_PATH, RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_RETENTION_DAYS
+from sqlite_db import create_retrieval_cache_table
+
+
+# ──────────────────────────────────────────────────────────────────
+# FAR/DFARS retrieval cache
+#
+# The same boilerplate clauses (termination for convenience, prompt
+# payment, ...) retrieve the same regulation chunks in every contract.
+# Entries map a clause fingerprint (sha1 of the lower-cased words) to
+# the [chunk id, score] pairs retrieved for it, under the hash of the
+# regulation index they came from. Rebuilding the index from a
+# different regulation text, chunking, retrieval mode or embedding
+# model changes the hash, so old entries simply stop matching. They
+# are not deleted on sight: another process may still serve the old
+# index (during a rolling restart, or a second worker pointed at other
+# regulation text). Entries of any other hash unused for
+# RETRIEVAL_CACHE_RETENTION_DAYS are expired when a cache is opened;
+# purge_other_indexes() drops the rest on request. A bounded
+# in-process LRU sits in front of the shared SQLite table.
+# ──────────────────────────────────────────────────────────────────
+
+_WORD = re.compile(r"\w+")
+
+
+def clause_fingerprint(text: str) -> str:
+    """Case, punctuation and whitespace differences map to the same fingerprint."""
+    return hashlib.sha1(" ".join(_WORD.findall(text.lower())).encode("utf-8")).hexdigest()
+
+
+def index_hash(*parts) -> str:
+    """Hash of everything that determines retrieval results (source bytes, chunking, model, k)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class RetrievalCache:
+    def __init__(self, index_hash: str, db_path=DB_PATH, memory_size: int = RETRIEVAL_CACHE_SIZE,
+                 retention_days: int = RETRIEVAL_CACHE_RETENTION_DAYS):
+        self.index_hash = index_hash
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            create_retrieval_cache_table(conn.cursor())
+            conn.execute(
+                "DELETE FROM retrieval_cache WHERE index_hash != ? AND COALESCE(used_at, created_at) < datetime('now', ?)",
+                (index_hash, f"-{retention_days} days"),
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _remember(self, fingerprint: str, chunk_ids: list) -> None:
+        with self._lock:
+            self._memory[fingerprint] = chunk_ids
+            self._memory.move_to_end(fingerprint)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def get_many(self, fingerprints: Iterable[str]) -> Dict[str, list]:
+        """Cached retrievals for the fingerprints that have them; counts hits and misses."""
+        wanted = list(dict.fromkeys(fingerprints))
+        found = {}
+        with self._lock:
+            for fp in wanted:
+                if fp in self._memory:
+                    self._memory.move_to_end(fp)
+                    found[fp] = self._memory[fp]
+        missing = [fp for fp in wanted if fp not in found]
+        if missing:
+            with self._connect() as conn:
+                for start in range(0, len(missing), 500):
+                    part = missing[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT fingerprint, chunk_ids FROM retrieval_cache "
+                        f"WHERE index_hash = ? AND fingerprint IN ({','.join('?' * len(part))})",
+                        [self.index_hash, *part],
+                    ).fetchall()
+                    for fp, chunk_ids in rows:
+                        found[fp] = json.loads(chunk_ids)
+                        self._remember(fp, found[fp])
+                stored_hits = [fp for fp in missing if fp in found]
+                if stored_hits:
+                    conn.executemany(
+                        "UPDATE retrieval_cache SET hits = hits + 1, used_at = datetime('now') "
+                        "WHERE index_hash = ? AND fingerprint = ?",
+                        [(self.index_hash, fp) for fp in stored_hits],
+                    )
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def get(self, fingerprint: str) -> Optional[list]:
+        return self.get_many([fingerprint]).get(fingerprint)
+
+    def put_many(self, entries: Dict[str, list]) -> None:
+        if not entries:
+            return
+        for fp, chunk_ids in entries.items():
+            self._remember(fp, list(chunk_ids))
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO retrieval_cache (index_hash, fingerprint, chunk_ids) VALUES (?, ?, ?)",
+                [(self.index_hash, fp, json.dumps(list(chunk_ids))) for fp, chunk_ids in entries.items()],
+            )
+
+    def purge_other_indexes(self) -> int:
+        """Delete the entries of every other index hash now. Returns how many were deleted."""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM retrieval_cache WHERE index_hash != ?", (self.index_hash,)).rowcount
+
+    def stats(self) -> Dict[str, object]:
+        with self._connect() as conn:
+            entries, stored_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM retrieval_cache WHERE index_hash = ?",
+                (self.index_hash,),
+            ).fetchone()
+        with self._lock:
+            hits, misses, in_memory = self.hits, self.misses, len(self._memory)
+        lookups = hits + misses
+        return {
+            "index_hash": self.index_hash,
+            "entries": entries,
+            "in_memory": in_memory,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            # Across every process sharing the table, since the index was built
+            "stored_hits": stored_hits,
+        }
@@ -133,7 +133,7 @@ from fastapi import APIRouter, UploadFile, File
 import pdfplumber, pytesseract, io, sqlite3, os
 from docx import Document
 import spacy
-from transformers import pipeline
+from routers.onnx_backend import load_pipeline
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
@@ -147,7 +147,7 @@ router = APIRouter()
 
 # ───────────────────────── NLP/ML MODELS ─────────────────────────
 nlp = spacy.load("en_core_web_sm")
-classifier = pipeline("text-classification", model="typeform/distilbert-base-uncased-mnli")
+classifier = load_pipeline("text-classification", model="typeform/distilbert-base-uncased-mnli")
 llm = ChatOpenAI(temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
 
 prompt = PromptTemplate.from_template(
@@ -1,5 +1,100 @@
 import sqlite3
 
+def create_contract_metadata_table(cursor):
+    """
+    Extracted contract metadata, one row per distinct document (sha256 of
+    the cleaned text). Typed columns carry the normalized values (ISO
+    dates, numeric amounts); metadata_json keeps the extractor's output
+    as-is so callers that skip re-extraction get the same fields back.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS contract_metadata (
+    doc_hash TEXT PRIMARY KEY,
+    source_file TEXT,
+    vendor_name TEXT,
+    contract_number TEXT,
+    contract_type TEXT,
+    contract_value REAL,
+    threshold REAL,
+    start_date TEXT,            -- ISO 'YYYY-MM-DD'
+    end_date TEXT,              -- ISO 'YYYY-MM-DD'
+    metadata_json TEXT NOT NULL,
+    extracted_at TEXT NOT NULL DEFAULT (datetime('now'))
+    ) WITHOUT ROWID
+    """)
+    # Each query filter paired with end_date, so "vendor X ending within N
+    # days" and "type Y ending within N days" are single range scans.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contract_metadata_vendor_end ON contract_metadata(vendor_name COLLATE NOCASE, end_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contract_metadata_type_end ON contract_metadata(contract_type COLLATE NOCASE, end_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contract_metadata_end ON contract_metadata(end_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contract_metadata_value ON contract_metadata(contract_value)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contract_metadata_number ON contract_metadata(contract_number COLLATE NOCASE)")
+
+def create_clause_dedup_tables(cursor):
+    """
+    Canonical clauses for near-duplicate detection: MinHash signature
+    (128 x uint32) and the enrichment results duplicates reuse, plus the
+    LSH band buckets (16 per canonical) candidates are looked up by.
+    config_hash fingerprints the models and modes that produced the
+    enrichment; a canonical only serves clauses enriched the same way.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clause_canonical (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    text TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    enrichment_json TEXT NOT NULL,   -- transformer_type, summary, validation
+    enrich_seconds REAL,             -- model time the enrichment cost
+    duplicates INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    UNIQUE (text_hash, config_hash)
+    )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clause_lsh (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    canonical_id INTEGER NOT NULL REFERENCES clause_canonical(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, canonical_id)
+    ) WITHOUT ROWID
+    """)
+
+def create_retrieval_cache_table(cursor):
+    """FAR/DFARS chunk ids retrieved per clause fingerprint, per regulation index build."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS retrieval_cache (
+    index_hash TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    chunk_ids TEXT NOT NULL,        -- JSON list, best first
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    used_at TEXT,                   -- last hit; NULL until the first
+    PRIMARY KEY (index_hash, fingerprint)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_retrieval_cache_used ON retrieval_cache(COALESCE(used_at, created_at))")
+
+def create_regulation_versions_table(cursor):
+    """
+    One row per regulation index build: the deduplicated sources it was
+    built from, the retrieval mode and how many chunks it holds.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS regulation_versions (
+    version TEXT PRIMARY KEY,
+    retrieval TEXT NOT NULL,            -- 'hybrid' | 'dense'
+    corpus_fingerprint TEXT NOT NULL,   -- sha256 over the unique normalized sources
+    sources_json TEXT NOT NULL,         -- [{path, fingerprint, bytes, duplicate_of}]
+    chunks INTEGER NOT NULL,
+    paragraphs INTEGER,
+    duplicate_paragraphs INTEGER,
+    built_at TEXT NOT NULL DEFAULT (datetime('now')),
+    loaded_at TEXT NOT NULL DEFAULT (datetime('now'))
+    ) WITHOUT ROWID
+    """)
+
 def init_db():
     with sqlite3.connect("contracts.db") as conn:
         cursor = conn.cursor()
@@ -18,6 +113,63 @@ def init_db():
         )
         """)
 
+        # Keyset pagination indexes for the contract request list: each
+        # filter column is paired with created_at (rowid is implicitly last),
+        # so a page filtered on one column is an index range scan in page
+        # order. They are not covering: the listed columns are read from the
+        # table, one rowid lookup per row returned (limit + 1), and further
+        # filters are checked on those rows.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contracts_created_at ON contracts(created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contracts_status_created_at ON contracts(status, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contracts_agency_created_at ON contracts(agency, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contracts_type_created_at ON contracts(contract_type, created_at)")
+
+        #________ Monthly contract counts (cycle-time chart) ___________
+        # Rolled up per (year-month, status) by triggers so the chart reads
+        # only the months it asks for instead of scanning contracts.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contract_monthly_counts'")
+        needs_backfill = cursor.fetchone() is None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contract_monthly_counts (
+        month TEXT NOT NULL,        -- 'YYYY-MM' taken from contracts.created_at
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, status)
+        ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contracts_monthly_insert AFTER INSERT ON contracts
+            BEGIN
+                INSERT INTO contract_monthly_counts (month, status, count)
+                VALUES (substr(NEW.created_at, 1, 7), NEW.status, 1)
+                ON CONFLICT(month, status) DO UPDATE SET count = count + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contracts_monthly_delete AFTER DELETE ON contracts
+            BEGIN
+                UPDATE contract_monthly_counts SET count = count - 1
+                WHERE month = substr(OLD.created_at, 1, 7) AND status = OLD.status;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_contracts_monthly_update AFTER UPDATE OF status, created_at ON contracts
+            BEGIN
+                UPDATE contract_monthly_counts SET count = count - 1
+                WHERE month = substr(OLD.created_at, 1, 7) AND status = OLD.status;
+                INSERT INTO contract_monthly_counts (month, status, count)
+                VALUES (substr(NEW.created_at, 1, 7), NEW.status, 1)
+                ON CONFLICT(month, status) DO UPDATE SET count = count + 1;
+            END
+        """)
+        if needs_backfill:
+            cursor.execute("""
+                INSERT INTO contract_monthly_counts (month, status, count)
+                SELECT substr(created_at, 1, 7), status, COUNT(*)
+                FROM contracts
+                GROUP BY substr(created_at, 1, 7), status
+            """)
+
         #________ Draft template ___________
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS contract_drafts (
@@ -39,6 +191,18 @@ def init_db():
         )""")
 
 
+        #______ extracted contract metadata ________
+        create_contract_metadata_table(cursor)
+
+        #______ near-duplicate clause cache ________
+        create_clause_dedup_tables(cursor)
+
+        #______ regulation retrieval cache ________
+        create_retrieval_cache_table(cursor)
+
+        #______ regulation index versions ________
+        create_regulation_versions_table(cursor)
+
         #______ contracts complaince table ________
         cursor.execute("""
             CREATE TABLE if not exists contract_compliance (
@@ -87,6 +251,7 @@ def init_db():
 
         #_______ audit logs ______________
         # Drop and recreate for clean dev testing
+        cursor.execute("DROP TABLE IF EXISTS audit_logs_fts")
         cursor.execute("DROP TABLE IF EXISTS audit_logs")
         cursor.execute("""
         CREATE TABLE audit_logs (
@@ -100,6 +265,42 @@ def init_db():
             category TEXT
         )
     """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp_category ON audit_logs(timestamp, category)")
+        # (filter, timestamp) pairs serve the audit log API's keyset pages;
+        # rowid rides along as the tie-breaker. Not covering: the page's
+        # columns (details included) come from the table, one rowid lookup
+        # per row returned.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_logs_user_timestamp ON audit_logs(user, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_logs_category_timestamp ON audit_logs(category, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_logs_action_timestamp ON audit_logs(action, timestamp)")
+
+        # Full-text index over audit_logs.details (external content, kept in sync by triggers)
+        cursor.execute("""
+        CREATE VIRTUAL TABLE audit_logs_fts USING fts5(
+            details,
+            content='audit_logs',
+            content_rowid='id'
+        )
+    """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_audit_logs_fts_insert AFTER INSERT ON audit_logs
+        BEGIN
+            INSERT INTO audit_logs_fts (rowid, details) VALUES (NEW.id, NEW.details);
+        END
+    """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_audit_logs_fts_delete AFTER DELETE ON audit_logs
+        BEGIN
+            INSERT INTO audit_logs_fts (audit_logs_fts, rowid, details) VALUES ('delete', OLD.id, OLD.details);
+        END
+    """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_audit_logs_fts_update AFTER UPDATE OF details ON audit_logs
+        BEGIN
+            INSERT INTO audit_logs_fts (audit_logs_fts, rowid, details) VALUES ('delete', OLD.id, OLD.details);
+            INSERT INTO audit_logs_fts (rowid, details) VALUES (NEW.id, NEW.details);
+        END
+    """)
 
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
@@ -0,0 +1,31 @@
+from routers.metadata_index import document_hash, extract_or_load
+
+
+class _CountingExtractor:
+    def __init__(self):
+        self.calls = 0
+
+    def extract_metadata_values(self, text):
+        self.calls += 1
+        return {"text": text}, {}
+
+
+def test_amount_and_date_change_the_hash():
+    first = "Contract value: $10,000. Term ends 12/1/2025."
+    assert document_hash(first) != document_hash("Contract value: $100.00. Term ends 1/21/2025.")
+    assert document_hash(first) != document_hash("Contract value: $10,000. Term ends 12/1/2026.")
+
+
+def test_whitespace_only_differences_share_a_hash():
+    assert document_hash("Section 1: Scope\n\n  nonproprietary data") == document_hash("Section 1: Scope nonproprietary data")
+
+
+def test_different_amounts_are_extracted_separately(tmp_path):
+    db_path = tmp_path / "contracts.db"
+    extractor = _CountingExtractor()
+    first = extract_or_load(extractor, "Contract value: $10,000. Term ends 12/1/2025.", db_path=db_path)
+    second = extract_or_load(extractor, "Contract value: $100.00. Term ends 1/21/2025.", db_path=db_path)
+    assert extractor.calls == 2
+    assert first != second
+    assert extract_or_load(extractor, "Contract value:  $10,000.\nTerm ends 12/1/2025.", db_path=db_path) == first
+    assert extractor.calls == 2